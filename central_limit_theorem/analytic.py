@@ -0,0 +1,59 @@
+from typing import Any, Dict
+
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+
+from ml_boilerplate_module.distributions import get_distribution, sample_population
+from ml_boilerplate_module.resampling import DEFAULT_N_RESAMPLES, RngLike, resample_means
+
+
+def analytic_sample_means(
+    distribution: str,
+    params: Dict[str, Any],
+    sample_size: int,
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    rng: RngLike = None,
+    dtype: npt.DTypeLike = np.float64,
+) -> npt.NDArray[np.floating]:
+    """Draw sample means directly from their exact sampling distribution.
+
+    Runs in O(n_resamples) without building or resampling a population.
+    """
+    mean_sampler = get_distribution(distribution).mean_sampler
+    if mean_sampler is None:
+        raise ValueError(f"No closed-form sampling distribution for: {distribution}")
+    means = mean_sampler(np.random.default_rng(rng), sample_size, n_resamples, **params)
+    return means.astype(dtype, copy=False)
+
+
+def compare_with_bootstrap(
+    analytic_means: npt.NDArray[np.floating], bootstrap_means: npt.NDArray[np.floating]
+) -> Dict[str, float]:
+    """Summarize how far the bootstrap estimate is from the analytic one."""
+    analytic_std = float(np.std(analytic_means))
+    bootstrap_std = float(np.std(bootstrap_means))
+    ks = stats.ks_2samp(analytic_means, bootstrap_means)
+    return {
+        "mean_diff": float(np.mean(bootstrap_means) - np.mean(analytic_means)),
+        "std_diff": bootstrap_std - analytic_std,
+        "rel_std_diff": abs(bootstrap_std - analytic_std) / analytic_std if analytic_std else float("nan"),
+        "ks_statistic": float(ks.statistic),
+        "ks_pvalue": float(ks.pvalue),
+    }
+
+
+def analytic_vs_bootstrap(
+    distribution: str,
+    params: Dict[str, Any],
+    sample_size: int,
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    population_size: int = 100_000,
+    rng: RngLike = None,
+) -> Dict[str, float]:
+    """Run both the analytic and the bootstrap path and report their difference."""
+    generator = np.random.default_rng(rng)
+    analytic_means = analytic_sample_means(distribution, params, sample_size, n_resamples, generator)
+    population = sample_population(distribution, params, population_size, generator)
+    bootstrap_means = resample_means(population, sample_size, n_resamples, rng=generator)
+    return compare_with_bootstrap(analytic_means, bootstrap_means)
@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+
+from ml_boilerplate_module.distributions import get_distribution, population_mean, population_std
+from ml_boilerplate_module.resampling import RngLike
+
+NORMALITY_TESTS = ("ks", "anderson", "qq")
+
+
+@dataclass
+class ConvergenceResult:
+    distribution: str
+    params: Dict[str, Any]
+    min_sample_size: Optional[int]
+    test: str
+    # sample_size -> (std_err, normality statistic, passed)
+    evaluations: Dict[int, Tuple[float, float, bool]] = field(default_factory=dict)
+
+
+class _PrefixMeans:
+    """Means of the first ``n`` draws of every resample, for any ``n`` up to the draw width."""
+
+    def __init__(
+        self,
+        distribution: str,
+        params: Dict[str, Any],
+        max_sample_size: int,
+        n_resamples: int,
+        rng: RngLike,
+        dtype: npt.DTypeLike,
+    ):
+        sampler = get_distribution(distribution).sampler
+        draws = sampler(np.random.default_rng(rng), n_resamples * max_sample_size, **params)
+        self._prefix_sums = np.cumsum(
+            np.asarray(draws, dtype=dtype).reshape(n_resamples, max_sample_size), axis=1, dtype=dtype
+        )
+
+    def __call__(self, sample_size: int) -> npt.NDArray[np.floating]:
+        return self._prefix_sums[:, sample_size - 1] / sample_size
+
+
+def _normality(
+    means: npt.NDArray[np.floating], mu: float, sigma: float, test: str, alpha: float, qq_r: float
+) -> Tuple[float, bool]:
+    if test == "ks":
+        pvalue = float(stats.kstest(means, "norm", args=(mu, sigma)).pvalue)
+        return pvalue, pvalue > alpha
+    if test == "anderson":
+        try:
+            result = stats.anderson(means, dist="norm", method="interpolate")
+        except TypeError:
+            # SciPy < 1.17 only reports critical values at fixed significance levels.
+            result = stats.anderson(means, dist="norm")
+        if hasattr(result, "pvalue"):
+            return float(result.statistic), float(result.pvalue) > alpha
+        levels = np.asarray(result.significance_level) / 100
+        critical = float(result.critical_values[np.argmin(np.abs(levels - alpha))])
+        return float(result.statistic), float(result.statistic) < critical
+    if test == "qq":
+        (_, _), (_, _, r) = stats.probplot(means, dist="norm")
+        return float(r), float(r) >= qq_r
+    raise ValueError(f"Unknown normality test: {test}, expected one of {NORMALITY_TESTS}")
+
+
+def find_min_sample_size(
+    distribution: str,
+    params: Optional[Dict[str, Any]] = None,
+    max_sample_size: int = 200,
+    n_resamples: int = 5_000,
+    test: str = "qq",
+    alpha: float = 0.05,
+    qq_threshold: float = 0.999,
+    std_err_threshold: float = 0.1,
+    strategy: str = "adaptive",
+    seed: RngLike = None,
+    dtype: npt.DTypeLike = np.float64,
+) -> ConvergenceResult:
+    """Smallest sample size at which the CLT approximation holds for a distribution.
+
+    One ``(n_resamples, max_sample_size)`` block of draws is generated up front and turned
+    into prefix sums, so the sample means for any candidate ``n`` are a single column
+    read instead of a fresh ``sample_means`` run. A size passes when the ``std_err`` of
+    the means against ``sigma / sqrt(n)`` is below ``std_err_threshold`` and the normality
+    test passes (KS p-value above ``alpha``, Anderson-Darling statistic below its critical
+    value at ``alpha``, or QQ correlation of at least ``qq_threshold``).
+
+    Args:
+        distribution: Registered distribution name, see ``distributions.list_distributions``
+        params: Distribution parameters
+        max_sample_size: Largest sample size considered
+        n_resamples: Number of resampled means per sample size
+        test: One of ``"ks"``, ``"anderson"`` or ``"qq"``
+        alpha: Significance level for the KS and Anderson-Darling tests
+        qq_threshold: Minimum QQ-plot correlation for the ``"qq"`` test
+        std_err_threshold: Same threshold as ``clt_holds`` in the CLT widgets
+        strategy: ``"adaptive"`` (doubling, then bisection) or ``"bisection"`` over [1, max]
+        seed: Seed for the pre-drawn samples
+        dtype: Floating dtype of the prefix sums; float32 halves memory
+
+    Returns:
+        ConvergenceResult with ``min_sample_size=None`` if even ``max_sample_size`` fails
+    """
+    params = params or {}
+    mu = population_mean(distribution, params)
+    population_sigma = population_std(distribution, params)
+    if not np.isfinite(population_sigma):
+        raise ValueError(f"{distribution} with {params} has infinite variance, the CLT does not apply")
+    prefix_means = _PrefixMeans(distribution, params, max_sample_size, n_resamples, seed, dtype)
+    result = ConvergenceResult(distribution, params, None, test)
+
+    def _passes(sample_size: int) -> bool:
+        if sample_size not in result.evaluations:
+            means = prefix_means(sample_size)
+            sigma = population_sigma / np.sqrt(sample_size)
+            std_err = float(abs(sigma - np.std(means)) / sigma) if sigma > 0 else 0.0
+            statistic, normal = _normality(means, mu, sigma, test, alpha, qq_threshold)
+            result.evaluations[sample_size] = (std_err, statistic, std_err < std_err_threshold and normal)
+        return result.evaluations[sample_size][2]
+
+    if strategy == "adaptive":
+        low, high = 0, 1
+        while high < max_sample_size and not _passes(high):
+            low, high = high, min(2 * high, max_sample_size)
+    elif strategy == "bisection":
+        low, high = 0, max_sample_size
+    else:
+        raise ValueError(f"Unknown search strategy: {strategy}")
+    if not _passes(high):
+        return result
+
+    # Invariant: `high` passes and `low` fails (0 stands for "no draws").
+    while high - low > 1:
+        middle = (low + high) // 2
+        if _passes(middle):
+            high = middle
+        else:
+            low = middle
+    result.min_sample_size = high
+    return result
@@ -0,0 +1,206 @@
+import csv
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ml_boilerplate_module.resampling import RngLike
+
+Sampler = Callable[..., npt.NDArray[Any]]
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """A population distribution the CLT simulations can run against.
+
+    ``sampler(rng, size, **params)`` draws a population, ``mean(**params)`` and
+    ``variance(**params)`` give its moments, and the optional
+    ``mean_sampler(rng, sample_size, n_resamples, **params)`` draws sample means
+    from their exact sampling distribution.
+    """
+
+    name: str
+    sampler: Sampler
+    mean: Callable[..., float]
+    variance: Callable[..., float]
+    mean_sampler: Optional[Sampler] = None
+    discrete: bool = False
+
+
+_REGISTRY: Dict[str, Distribution] = {}
+
+
+def register_distribution(distribution: Distribution, overwrite: bool = False) -> Distribution:
+    if distribution.name in _REGISTRY and not overwrite:
+        raise ValueError(f"Distribution already registered: {distribution.name}")
+    _REGISTRY[distribution.name] = distribution
+    return distribution
+
+
+def get_distribution(name: str) -> Distribution:
+    if name not in _REGISTRY:
+        raise ValueError(f"Unknown distribution: {name}")
+    return _REGISTRY[name]
+
+
+def list_distributions() -> List[str]:
+    return sorted(_REGISTRY)
+
+
+def sample_population(
+    distribution: str, params: Dict[str, Any], size: int = 100_000, rng: RngLike = None
+) -> npt.NDArray[Any]:
+    return get_distribution(distribution).sampler(np.random.default_rng(rng), size, **params)
+
+
+def population_mean(distribution: str, params: Dict[str, Any]) -> float:
+    return float(get_distribution(distribution).mean(**params))
+
+
+def population_std(distribution: str, params: Dict[str, Any]) -> float:
+    return float(np.sqrt(get_distribution(distribution).variance(**params)))
+
+
+def _pareto_mean(alpha: float, scale: float = 1.0) -> float:
+    return alpha * scale / (alpha - 1) if alpha > 1 else np.inf
+
+
+def _pareto_variance(alpha: float, scale: float = 1.0) -> float:
+    return scale**2 * alpha / ((alpha - 1) ** 2 * (alpha - 2)) if alpha > 2 else np.inf
+
+
+# Exact sampling distributions of the mean of m iid draws:
+# Normal(mu, sigma / sqrt(m)), Binomial(n * m, p) / m, Poisson(mu * m) / m and Gamma(m, scale / m).
+register_distribution(
+    Distribution(
+        name="gaussian",
+        sampler=lambda rng, size, mu, sigma: rng.normal(mu, sigma, size),
+        mean=lambda mu, sigma: mu,
+        variance=lambda mu, sigma: sigma**2,
+        mean_sampler=lambda rng, m, n_resamples, mu, sigma: rng.normal(mu, sigma / np.sqrt(m), n_resamples),
+    )
+)
+register_distribution(
+    Distribution(
+        name="binomial",
+        sampler=lambda rng, size, n, p: rng.binomial(n, p, size),
+        mean=lambda n, p: n * p,
+        variance=lambda n, p: n * p * (1 - p),
+        mean_sampler=lambda rng, m, n_resamples, n, p: rng.binomial(n * m, p, n_resamples) / m,
+        discrete=True,
+    )
+)
+register_distribution(
+    Distribution(
+        name="poisson",
+        sampler=lambda rng, size, mu: rng.poisson(mu, size),
+        mean=lambda mu: mu,
+        variance=lambda mu: mu,
+        mean_sampler=lambda rng, m, n_resamples, mu: rng.poisson(mu * m, n_resamples) / m,
+        discrete=True,
+    )
+)
+register_distribution(
+    Distribution(
+        name="exponential",
+        sampler=lambda rng, size, scale=1.0: rng.exponential(scale, size),
+        mean=lambda scale=1.0: scale,
+        variance=lambda scale=1.0: scale**2,
+        mean_sampler=lambda rng, m, n_resamples, scale=1.0: rng.gamma(m, scale / m, n_resamples),
+    )
+)
+register_distribution(
+    Distribution(
+        name="uniform",
+        sampler=lambda rng, size, low=0.0, high=1.0: rng.uniform(low, high, size),
+        mean=lambda low=0.0, high=1.0: (low + high) / 2,
+        variance=lambda low=0.0, high=1.0: (high - low) ** 2 / 12,
+    )
+)
+register_distribution(
+    Distribution(
+        name="lognormal",
+        sampler=lambda rng, size, mean=0.0, sigma=1.0: rng.lognormal(mean, sigma, size),
+        mean=lambda mean=0.0, sigma=1.0: np.exp(mean + sigma**2 / 2),
+        variance=lambda mean=0.0, sigma=1.0: (np.exp(sigma**2) - 1) * np.exp(2 * mean + sigma**2),
+    )
+)
+register_distribution(
+    Distribution(
+        name="pareto",
+        sampler=lambda rng, size, alpha, scale=1.0: (rng.pareto(alpha, size) + 1) * scale,
+        mean=_pareto_mean,
+        variance=_pareto_variance,
+    )
+)
+
+
+def register_mixture(
+    name: str, components: Sequence[Tuple[float, str, Dict[str, Any]]], overwrite: bool = False
+) -> Distribution:
+    """Register a finite mixture of already registered distributions.
+
+    Args:
+        name: Registry name of the mixture
+        components: ``(weight, distribution, params)`` triples; weights are normalized
+        overwrite: Replace an existing entry with the same name
+    """
+    weights = np.array([weight for weight, _, _ in components], dtype=np.float64)
+    weights /= weights.sum()
+    parts = [(get_distribution(dist_name), params) for _, dist_name, params in components]
+    means = np.array([part.mean(**params) for part, params in parts])
+    variances = np.array([part.variance(**params) for part, params in parts])
+    mixture_mean = float(weights @ means)
+    mixture_variance = float(weights @ (variances + means**2) - mixture_mean**2)
+
+    def _sampler(rng: np.random.Generator, size: int) -> npt.NDArray[Any]:
+        counts = rng.multinomial(size, weights)
+        draws = [part.sampler(rng, count, **params) for (part, params), count in zip(parts, counts)]
+        return rng.permutation(np.concatenate(draws).astype(np.float64, copy=False))
+
+    return register_distribution(
+        Distribution(
+            name=name,
+            sampler=_sampler,
+            mean=lambda: mixture_mean,
+            variance=lambda: mixture_variance,
+            discrete=all(part.discrete for part, _ in parts),
+        ),
+        overwrite=overwrite,
+    )
+
+
+def register_array(name: str, values: npt.ArrayLike, overwrite: bool = False) -> Distribution:
+    """Register an empirical distribution that resamples ``values`` with replacement."""
+    data = np.asarray(values, dtype=np.float64).ravel()
+    data = data[np.isfinite(data)]
+    if data.size == 0:
+        raise ValueError(f"No finite values to register for: {name}")
+    data_mean = float(data.mean())
+    data_variance = float(data.var())
+    return register_distribution(
+        Distribution(
+            name=name,
+            sampler=lambda rng, size: data[rng.integers(0, data.size, size)],
+            mean=lambda: data_mean,
+            variance=lambda: data_variance,
+            discrete=bool(np.all(data == np.round(data))),
+        ),
+        overwrite=overwrite,
+    )
+
+
+def load_dataset_column(path: str, column: str, delimiter: str = ",") -> npt.NDArray[np.float64]:
+    """Read one numeric column from a delimited file such as ``datasets/test_task.csv``.
+
+    Empty and non-numeric cells are skipped.
+    """
+    values = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            try:
+                values.append(float(row[column]))
+            except (TypeError, ValueError):
+                continue
+    return np.array(values, dtype=np.float64)
@@ -0,0 +1,155 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from ml_boilerplate_module.distributions import population_std, sample_population
+from ml_boilerplate_module.resampling import DEFAULT_N_RESAMPLES, RngLike
+from ml_boilerplate_module.streaming import clt_diagnostics, stream_sample_means
+
+RESULT_COLUMNS = [
+    "distribution",
+    "params",
+    "sample_size",
+    "n_resamples",
+    "mean_of_means",
+    "std_of_means",
+    "theoretical_std",
+    "std_err",
+    "clt_holds",
+    "condition_value",
+]
+
+
+def condition_value(distribution: str, params: Dict[str, Any], sample_size: int) -> float:
+    """Rule-of-thumb normality condition shown by ``binomial_clt``: min(N * p, N * (1 - p))."""
+    if distribution == "binomial":
+        N = params["n"] * sample_size
+        return float(min(N * params["p"], N * (1 - params["p"])))
+    if distribution == "poisson":
+        return float(params["mu"] * sample_size)
+    return float("nan")
+
+
+def run_experiment(
+    distribution: str,
+    params: Dict[str, Any],
+    sample_size: int,
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    population_size: int = 100_000,
+    seed: RngLike = None,
+) -> Dict[str, Any]:
+    """Run one CLT simulation without plotting and return its results row."""
+    rng = np.random.default_rng(seed)
+    population = sample_population(distribution, params, population_size, rng)
+    accumulator = stream_sample_means(population, sample_size, n_resamples, rng=rng)
+    diagnostics = clt_diagnostics(accumulator, population_std(distribution, params) / np.sqrt(sample_size))
+    return {
+        "distribution": distribution,
+        "params": json.dumps(params, sort_keys=True),
+        "sample_size": sample_size,
+        "n_resamples": n_resamples,
+        "mean_of_means": diagnostics["mean_of_means"],
+        "std_of_means": diagnostics["std_of_means"],
+        "theoretical_std": diagnostics["clt_std"],
+        "std_err": diagnostics["std_err"],
+        "clt_holds": diagnostics["clt_holds"],
+        "condition_value": condition_value(distribution, params, sample_size),
+    }
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else [value]
+
+
+def expand_grid(spec: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Expand sweep specs into individual configurations.
+
+    Each spec looks like ``{"distribution": "binomial", "params": {"n": [2, 10], "p": [0.5]},
+    "sample_size": [2, 5, 10]}``; scalars are treated as single-value lists.
+    """
+    configs = []
+    for entry in spec:
+        params = {key: _as_list(value) for key, value in entry["params"].items()}
+        sample_sizes = _as_list(entry["sample_size"])
+        for values in itertools.product(*params.values()):
+            for sample_size in sample_sizes:
+                configs.append(
+                    {
+                        "distribution": entry["distribution"],
+                        "params": dict(zip(params.keys(), values)),
+                        "sample_size": sample_size,
+                    }
+                )
+    return configs
+
+
+def _run_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    return run_experiment(**config)
+
+
+def run_sweep(
+    configs: List[Dict[str, Any]],
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    population_size: int = 100_000,
+    seed: int | None = None,
+    n_workers: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Run every configuration on a process pool.
+
+    Configuration ``i`` uses the ``i``-th child of ``SeedSequence(seed)``, so results
+    do not depend on the number of workers or on scheduling order.
+    """
+    streams = np.random.SeedSequence(seed).spawn(len(configs))
+    jobs = [
+        {**config, "n_resamples": n_resamples, "population_size": population_size, "seed": stream}
+        for config, stream in zip(configs, streams)
+    ]
+    if n_workers == 1:
+        return [_run_config(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (4 * (n_workers or os.cpu_count() or 1)))
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(_run_config, jobs, chunksize=chunksize))
+
+
+def write_results(rows: List[Dict[str, Any]], path: str) -> None:
+    """Write result rows to Parquet (``.parquet``, requires pyarrow) or CSV."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Writing Parquet requires pyarrow; use a .csv output path instead") from e
+        pq.write_table(pa.Table.from_pylist(rows), path)
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run headless CLT parameter sweeps")
+    parser.add_argument("grid", help="JSON file with a list of sweep specs, see expand_grid")
+    parser.add_argument("output", help="Output path (.parquet or .csv)")
+    parser.add_argument("--n-resamples", type=int, default=DEFAULT_N_RESAMPLES)
+    parser.add_argument("--population-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.grid, "r", encoding="utf-8") as f:
+        configs = expand_grid(json.load(f))
+    print(f"Running {len(configs)} configurations...")
+    rows = run_sweep(configs, args.n_resamples, args.population_size, args.seed, args.workers)
+    write_results(rows, args.output)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+from matplotlib.figure import Figure
+
+from ml_boilerplate_module.fast_plots import (
+    DEFAULT_BINS,
+    DEFAULT_N_QUANTILES,
+    binned_histogram,
+    binned_kde,
+    quantile_qq,
+)
+
+Curve = Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]
+
+
+def _fill_vertices(x: npt.NDArray[np.float64], y: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return np.concatenate([np.column_stack([x, y]), np.column_stack([x[::-1], np.zeros_like(y)])])
+
+
+class CLTFigure:
+    """Population / sample-means / QQ mosaic whose artists are created once.
+
+    ``update`` mutates the existing histogram steps, KDE line and fill, Gaussian curve
+    and QQ points in place, so repeated widget interactions reuse one figure instead of
+    building (and leaking) a new one. The figure is not registered with pyplot; show it
+    with ``IPython.display.display(clt_figure.figure)``.
+    """
+
+    def __init__(
+        self,
+        bins: int = DEFAULT_BINS,
+        n_quantiles: int = DEFAULT_N_QUANTILES,
+        figsize: Tuple[float, float] = (10, 5),
+    ):
+        self.bins = bins
+        self.n_quantiles = n_quantiles
+        self.figure = Figure(figsize=figsize)
+        axes = self.figure.subplot_mosaic([["top row", "top row"], ["bottom left", "bottom right"]])
+        self.ax_population = axes["top row"]
+        self.ax_means = axes["bottom left"]
+        self.ax_qq = axes["bottom right"]
+        self.ax_population.set_title("Population Distribution")
+        self.ax_means.set_title("Sample Means Distribution")
+        self.ax_qq.set_title("QQ Plot of Sample Means")
+        self.ax_qq.set_xlabel("Theoretical quantiles")
+        self.ax_qq.set_ylabel("Ordered Values")
+
+        empty = np.zeros(1)
+        edges = np.array([0.0, 1.0])
+        self.population_hist = self.ax_population.stairs(empty, edges, fill=True, alpha=0.6)
+        (self.population_curve,) = self.ax_population.plot([], [], marker=".")
+        self.means_hist = self.ax_means.stairs(empty, edges, fill=True, alpha=0.6, label="hist")
+        (self.kde_line,) = self.ax_means.plot([], [], color="crimson", linestyle="dashed", label="kde")
+        self.kde_fill = self.ax_means.fill_between([0.0, 1.0], [0.0, 0.0], color="crimson", alpha=0.25)
+        (self.gaussian_line,) = self.ax_means.plot([], [], color="black", linestyle="solid", label="gaussian")
+        (self.qq_points,) = self.ax_qq.plot([], [], "bo")
+        (self.qq_fit,) = self.ax_qq.plot([], [], "r-")
+        self.ax_means.legend()
+        self._laid_out = False
+
+    def update(
+        self,
+        sample_means: npt.ArrayLike,
+        gaussian: Curve,
+        population: npt.ArrayLike | None = None,
+        population_curve: Curve | None = None,
+    ) -> Figure:
+        """Refresh all artists from new data.
+
+        Args:
+            sample_means: Resampled means for the histogram, KDE and QQ plot
+            gaussian: ``(x, pdf)`` of the CLT normal approximation
+            population: Population sample for the top histogram
+            population_curve: ``(x, pdf_or_pmf)`` drawn instead when there is no population array
+        """
+        if population is not None:
+            self.population_hist.set_data(*binned_histogram(population, self.bins))
+        elif population_curve is not None:
+            self.population_curve.set_data(*population_curve)
+        self.population_hist.set_visible(population is not None)
+        self.population_curve.set_visible(population is None)
+
+        self.means_hist.set_data(*binned_histogram(sample_means, self.bins))
+        grid, density = binned_kde(sample_means)
+        self.kde_line.set_data(grid, density)
+        self.kde_fill.set_verts([_fill_vertices(grid, density)])
+        self.gaussian_line.set_data(*gaussian)
+
+        (theoretical, ordered), (slope, intercept, _) = quantile_qq(sample_means, self.n_quantiles)
+        self.qq_points.set_data(theoretical, ordered)
+        self.qq_fit.set_data(theoretical, slope * theoretical + intercept)
+
+        for ax in (self.ax_population, self.ax_means, self.ax_qq):
+            ax.relim(visible_only=True)
+            ax.autoscale_view()
+        if not self._laid_out:
+            self.figure.tight_layout()
+            self._laid_out = True
+        self.figure.canvas.draw_idle()
+        return self.figure
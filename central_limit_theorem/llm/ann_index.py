@@ -0,0 +1,149 @@
+from typing import Any, List
+
+import numpy as np
+import numpy.typing as npt
+
+
+def _assign(
+    vectors: npt.NDArray[Any], centroids: npt.NDArray[Any], batch_size: int = 8192, l2: bool = False
+) -> npt.NDArray[np.intp]:
+    """Index of the best centroid for every vector, computed in batches.
+
+    Centroids are ranked by inner product, or by Euclidean distance when ``l2`` is set
+    (``argmin |x - c|^2 == argmax x.c - |c|^2 / 2``).
+    """
+    offsets = 0.5 * np.einsum("ij,ij->i", centroids, centroids) if l2 else 0.0
+    assignments = np.empty(vectors.shape[0], dtype=np.intp)
+    for start in range(0, vectors.shape[0], batch_size):
+        batch = vectors[start : start + batch_size]
+        assignments[start : start + batch_size] = np.argmax(batch @ centroids.T - offsets, axis=1)
+    return assignments
+
+
+def kmeans(
+    vectors: npt.NDArray[Any],
+    n_clusters: int,
+    n_iter: int = 10,
+    rng: np.random.Generator | None = None,
+    l2: bool = False,
+) -> npt.NDArray[np.float64]:
+    """Lloyd's k-means, returning float64 centroids.
+
+    Empty clusters are re-seeded from random points so every centroid stays in use.
+    """
+    rng = rng or np.random.default_rng()
+    centroids = np.array(vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)], dtype=np.float64)
+    for _ in range(n_iter):
+        assignments = _assign(vectors, centroids, l2=l2)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        centroids[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()))]
+    return centroids
+
+
+class IVFFlatIndex:
+    """Inverted-file index with a k-means coarse quantizer and exact scoring inside lists.
+
+    Vectors are bucketed by their nearest centroid, by inner product or by Euclidean
+    distance when ``l2`` is set. A query scores the ``nprobe`` best lists only, so
+    raising ``nprobe`` trades latency for recall; ``nprobe == n_lists`` is exact search.
+    The index stores vector ids only; scoring reads rows from the caller's matrix.
+    """
+
+    def __init__(
+        self,
+        centroids: npt.NDArray[Any],
+        lists: List[npt.NDArray[np.int64]],
+        nprobe: int = 8,
+        l2: bool = False,
+    ):
+        self.centroids = centroids
+        self.lists = lists
+        self.nprobe = nprobe
+        self.l2 = l2
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.lists)
+
+    @classmethod
+    def train(
+        cls,
+        vectors: npt.NDArray[Any],
+        ids: npt.NDArray[np.int64],
+        n_lists: int | None = None,
+        nprobe: int = 8,
+        n_iter: int = 10,
+        sample_size: int = 100_000,
+        seed: int | None = 0,
+        l2: bool = False,
+    ) -> "IVFFlatIndex":
+        """Run k-means on (a sample of) ``vectors`` and bucket every vector.
+
+        ``n_lists`` defaults to ``4 * sqrt(len(vectors))``.
+        """
+        if vectors.shape[0] == 0:
+            raise ValueError("Cannot train an index without vectors")
+        rng = np.random.default_rng(seed)
+        n_lists = n_lists or int(4 * np.sqrt(vectors.shape[0]))
+        n_lists = max(1, min(n_lists, vectors.shape[0]))
+        sample = vectors
+        if vectors.shape[0] > sample_size:
+            sample = vectors[np.sort(rng.choice(vectors.shape[0], sample_size, replace=False))]
+        centroids = kmeans(sample, n_lists, n_iter, rng, l2)
+        empty_lists = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        index = cls(centroids.astype(vectors.dtype), empty_lists, nprobe, l2)
+        index.add(ids, vectors)
+        return index
+
+    def add(self, ids: npt.ArrayLike, vectors: npt.NDArray[Any]) -> None:
+        ids = np.asarray(ids, dtype=np.int64).ravel()
+        assignments = _assign(np.atleast_2d(vectors), self.centroids, l2=self.l2)
+        for list_no in np.unique(assignments):
+            self.lists[list_no] = np.concatenate([self.lists[list_no], ids[assignments == list_no]])
+
+    def remove(self, ids: npt.ArrayLike) -> None:
+        ids = np.asarray(ids, dtype=np.int64).ravel()
+        self.lists = [members[~np.isin(members, ids)] for members in self.lists]
+
+    def candidates(self, query: npt.NDArray[Any], nprobe: int | None = None) -> npt.NDArray[np.int64]:
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        centroid_scores = self.centroids @ query
+        if self.l2:
+            centroid_scores -= 0.5 * np.einsum("ij,ij->i", self.centroids, self.centroids)
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[list_no] for list_no in probed])
+
+    def candidate_rows(
+        self, query: npt.NDArray[Any], matrix_ids: npt.NDArray[np.int64], nprobe: int | None = None
+    ) -> npt.NDArray[np.intp]:
+        """Row positions (into a matrix whose rows are sorted by ``matrix_ids``) of the probed lists."""
+        if len(matrix_ids) == 0:
+            return np.empty(0, dtype=np.intp)
+        candidate_ids = self.candidates(query, nprobe)
+        rows = np.minimum(np.searchsorted(matrix_ids, candidate_ids), len(matrix_ids) - 1)
+        # Drop ids that are no longer in the matrix
+        return rows[matrix_ids[rows] == candidate_ids]
+
+    def save(self, path: str) -> None:
+        lengths = np.array([len(ids) for ids in self.lists], dtype=np.int64)
+        members = np.concatenate(self.lists) if self.lists else np.empty(0, dtype=np.int64)
+        with open(path, "wb") as f:
+            np.savez(
+                f, centroids=self.centroids, lengths=lengths, members=members, nprobe=self.nprobe, l2=self.l2
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFFlatIndex":
+        with np.load(path) as data:
+            offsets = np.concatenate([[0], np.cumsum(data["lengths"])])
+            members = data["members"]
+            lists = [members[offsets[i] : offsets[i + 1]].copy() for i in range(len(data["lengths"]))]
+            l2 = bool(data["l2"]) if "l2" in data else False
+            return cls(data["centroids"], lists, int(data["nprobe"]), l2)
@@ -5,8 +5,8 @@ import gradio as gr
 
 from ml_boilerplate_module import load_config
 from ml_boilerplate_module.llm.chat import Agent
+from ml_boilerplate_module.llm.embedding_cache import EmbeddingCache
 from ml_boilerplate_module.llm.interfaces import LLMResponse, Message
-from ml_boilerplate_module.llm.nlp_utils import embed_text
 from ml_boilerplate_module.llm.vectordb import SqliteVectorDB
 
 # Alternative: Custom theme approach
@@ -22,6 +22,10 @@ load_config()
 
 print("Instantiating vector db...")
 chatbot = Agent(provider="openai", model="gpt-4o")
+# Repeated queries are answered from disk instead of another embeddings request
+embedding_cache = EmbeddingCache(
+    db_path=r"D:\projects\machine_learning_workspace\ml-boilerplate\dataset/embedding_cache.db"
+)
 
 CLIENT_MODELS = {
     "OpenAI": ["gpt-4o", "gpt-4o-mini", "gpt-4.1", "gpt-4.1-nano", "gpt-4.5-preview", "o3-mini"],
@@ -132,7 +136,7 @@ def send_message(
     print("Instantiating vector db...")
     vector_db = SqliteVectorDB(
         db_path=r"D:\projects\machine_learning_workspace\ml-boilerplate\dataset/bio_vector_db.db",
-        embed_fn=embed_text,
+        embed_fn=embedding_cache,
     )
     print("Setting vector db...")
     chatbot.vector_db = vector_db
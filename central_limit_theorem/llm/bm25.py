@@ -0,0 +1,165 @@
+import re
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, so "HealthGenLLM" in a query matches "healthgenllm" in a chunk."""
+    return _TOKEN.findall(text.lower())
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists by summing ``1 / (k + rank)`` over the lists each id appears in.
+
+    Returns:
+        ``(id, fused score)`` pairs, best first
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 inverted index stored in SQLite tables next to the documents it covers.
+
+    Postings are ``(term, doc_id, tf)`` rows in a ``WITHOUT ROWID`` table clustered on
+    ``term``, so a query reads only the posting lists of its own terms. Document
+    frequencies are kept per term, so a query reads its terms rarest first and stops
+    before the posting lists would exceed ``max_postings`` rows: common terms ("what",
+    "does") are dropped once the collection is large enough for them to be expensive,
+    which bounds the cost of a query independently of the corpus size. Writes go through
+    the caller's connection and are committed with the caller's transaction.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        k1: float = 1.5,
+        b: float = 0.75,
+        max_postings: int = 100_000,
+    ):
+        self.conn = conn
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS bm25_postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bm25_postings_doc_id ON bm25_postings (doc_id)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS bm25_docs (doc_id INTEGER PRIMARY KEY, length INTEGER NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS bm25_terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        # Indexes created before document frequencies were stored
+        has_postings = self.conn.execute("SELECT 1 FROM bm25_postings LIMIT 1").fetchone() is not None
+        if has_postings and self.conn.execute("SELECT 1 FROM bm25_terms LIMIT 1").fetchone() is None:
+            self.conn.execute(
+                "INSERT INTO bm25_terms (term, df) SELECT term, COUNT(*) FROM bm25_postings GROUP BY term"
+            )
+            self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM bm25_docs").fetchone()[0]
+
+    def add(self, docs: List[Tuple[int, str]]) -> None:
+        """Index ``(doc_id, text)`` pairs, replacing the postings of ids already indexed."""
+        self.remove([doc_id for doc_id, _ in docs])
+        postings = []
+        lengths = []
+        for doc_id, text in docs:
+            tokens = tokenize(text)
+            lengths.append((doc_id, len(tokens)))
+            postings.extend((term, doc_id, tf) for term, tf in Counter(tokens).items())
+        self.conn.executemany("INSERT INTO bm25_postings (term, doc_id, tf) VALUES (?, ?, ?)", postings)
+        self.conn.executemany("INSERT INTO bm25_docs (doc_id, length) VALUES (?, ?)", lengths)
+        self.conn.executemany(
+            "INSERT INTO bm25_terms (term, df) VALUES (?, ?) "
+            "ON CONFLICT (term) DO UPDATE SET df = df + excluded.df",
+            Counter(term for term, _, _ in postings).items(),
+        )
+
+    def remove(self, doc_ids: List[int]) -> None:
+        # Stay under SQLite's default limit of 999 bound variables per statement
+        for start in range(0, len(doc_ids), 900):
+            batch = doc_ids[start : start + 900]
+            placeholders = ",".join("?" * len(batch))
+            removed_terms = self.conn.execute(
+                f"SELECT term, COUNT(*) FROM bm25_postings WHERE doc_id IN ({placeholders}) GROUP BY term",
+                batch,
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE bm25_terms SET df = df - ? WHERE term = ?",
+                [(count, term) for term, count in removed_terms],
+            )
+            self.conn.execute("DELETE FROM bm25_terms WHERE df <= 0")
+            self.conn.execute(f"DELETE FROM bm25_postings WHERE doc_id IN ({placeholders})", batch)
+            self.conn.execute(f"DELETE FROM bm25_docs WHERE doc_id IN ({placeholders})", batch)
+
+    def search(
+        self, query: str, k: int = 10, doc_ids: npt.NDArray[np.int64] | None = None
+    ) -> List[Tuple[int, float]]:
+        """Top k ``(doc_id, score)`` pairs for ``query``, best first.
+
+        ``doc_ids`` restricts the results to a subset (e.g. a metadata filter); document
+        frequencies are still taken over the whole collection.
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        n_docs, avg_length = self.conn.execute("SELECT COUNT(*), AVG(length) FROM bm25_docs").fetchone()
+        if not query_terms or not n_docs:
+            return []
+        placeholders = ",".join("?" * len(query_terms))
+        frequencies = self.conn.execute(
+            f"SELECT term, df FROM bm25_terms WHERE term IN ({placeholders}) ORDER BY df", query_terms
+        ).fetchall()
+        terms: List[str] = []
+        df_list: List[int] = []
+        for term, term_df in frequencies:
+            if sum(df_list) + term_df > self.max_postings:
+                break
+            terms.append(term)
+            df_list.append(term_df)
+        if not terms:
+            return []
+        placeholders = ",".join("?" * len(terms))
+        rows = self.conn.execute(
+            "SELECT p.term, p.doc_id, p.tf, d.length FROM bm25_postings p "
+            f"JOIN bm25_docs d ON d.doc_id = p.doc_id WHERE p.term IN ({placeholders})",
+            terms,
+        ).fetchall()
+        if not rows:
+            return []
+        row_terms, row_docs, tf, length = zip(*rows)
+        term_index = {term: i for i, term in enumerate(terms)}
+        term_rows = np.array([term_index[term] for term in row_terms])
+        df = np.array(df_list, dtype=np.float64)
+        idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        tf_array = np.array(tf, dtype=np.float64)
+        norm = self.k1 * (1 - self.b + self.b * np.array(length, dtype=np.float64) / max(avg_length, 1e-9))
+        term_scores = idf[term_rows] * tf_array * (self.k1 + 1) / (tf_array + norm)
+
+        docs, inverse = np.unique(np.array(row_docs, dtype=np.int64), return_inverse=True)
+        scores = np.bincount(inverse, weights=term_scores, minlength=len(docs))
+        if doc_ids is not None:
+            keep = np.isin(docs, doc_ids)
+            docs, scores = docs[keep], scores[keep]
+        k = min(k, len(docs))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(docs[i]), float(scores[i])) for i in best]
@@ -1,8 +1,8 @@
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 from ml_boilerplate_module.llm.client_factory import get_llm_client
 from ml_boilerplate_module.llm.interfaces import LLMResponse, Message
-from ml_boilerplate_module.llm.vectordb import VectorDB
+from ml_boilerplate_module.llm.vectordb import VectorDB, metadata_text
 
 
 class Agent:
@@ -11,6 +11,8 @@ class Agent:
         provider: str,
         model: str,
         prompt_context: Optional[str] = None,
+        retrieval_k: int = 5,
+        hybrid_retrieval: bool = True,
     ):
         self._provider = provider
         self._model = model
@@ -18,6 +20,8 @@ class Agent:
         self._vector_db: Optional[VectorDB] = None
         self._message_history: List[Message] = []
         self._prompt_context: Optional[str] = prompt_context
+        self._retrieval_k = retrieval_k
+        self._hybrid_retrieval = hybrid_retrieval
 
     def add_message(self, role: str, content: str) -> None:
         self._message_history.append(Message(role=role, content=content))
@@ -53,17 +57,20 @@ class Agent:
     def set_client(self) -> None:
         self._client = get_llm_client(provider=self._provider, model=self._model)
 
-    def retrieve_context(self, query: str) -> List[str]:
+    def _search(self, query: str) -> List[Tuple[Any, ...]]:
         if self._vector_db is None:
             raise ValueError("Vector database is not set")
-        results = self._vector_db.search_vectors(query)
-        return [result[2] for result in results]
+        # Hybrid results fuse BM25 and vector ranks, so fewer chunks cover exact-term queries
+        if self._hybrid_retrieval:
+            return self._vector_db.search_hybrid(query, k=self._retrieval_k)  # type: ignore
+        return self._vector_db.search_vectors(query, k=self._retrieval_k)  # type: ignore
+
+    def retrieve_context(self, query: str) -> List[str]:
+        # Results are (id, embedding, score, metadata)
+        return [metadata_text(result[3]) for result in self._search(query)]
 
     def retrieve_context_with_score(self, query: str) -> List[Tuple[str, float]]:
-        if self._vector_db is None:
-            raise ValueError("Vector database is not set")
-        results = self._vector_db.search_vectors(query)
-        return [(result[2], result[1]) for result in results]
+        return [(metadata_text(result[3]), result[2]) for result in self._search(query)]
 
     def send_message(
         self,
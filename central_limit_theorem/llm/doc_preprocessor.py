@@ -3,7 +3,7 @@ import json
 import os
 import re
 import shutil
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 from unstructured.partition.md import partition_md
 from unstructured.partition.pdf import partition_pdf
@@ -15,6 +15,59 @@ def safe_filename(base: str, ext: str) -> str:
     return f"{base}.{ext}"
 
 
+def _replace_file(path: str, lines: Iterable[str]) -> None:
+    # Write to a temporary file first so an interrupted run never truncates the existing file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+    os.replace(tmp_path, path)
+
+
+def write_chunks_jsonl(
+    json_path: str,
+    chunks: List[Dict[str, Any]],
+    source: Optional[str] = None,
+    source_doc_ids: Optional[Iterable[str]] = None,
+) -> None:
+    """Write chunks to a JSONL file, replacing any earlier chunks of the same documents.
+
+    Chunks of other documents already in the file are kept, so PDF and markdown runs can
+    share one file, and re-processing a document replaces its chunks instead of appending
+    duplicates. Empty chunks (failed parses) are dropped.
+
+    With ``source`` (e.g. ``"pdf"``) and ``source_doc_ids`` (every document currently in
+    that source folder, including ones that failed to parse), the documents each source
+    contributed are recorded in ``json_path + ".sources.json"``. Chunks of documents that
+    have since been deleted from the folder are then dropped, so ``sync_documents`` with
+    ``delete_missing`` removes them from the store too.
+    """
+    doc_ids = {chunk.get("doc_id") for chunk in chunks}
+    removed: Set[str] = set()
+    manifest_path = json_path + ".sources.json"
+    manifest: Dict[str, List[str]] = {}
+    if source is not None and source_doc_ids is not None:
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        current = set(source_doc_ids)
+        removed = set(manifest.get(source, [])) - current
+        manifest[source] = sorted(current)
+    merged = []
+    if os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk and chunk.get("doc_id") not in doc_ids and chunk.get("doc_id") not in removed:
+                    merged.append(chunk)
+    merged.extend(chunk for chunk in chunks if chunk)
+    _replace_file(json_path, (json.dumps(chunk, ensure_ascii=False) for chunk in merged))
+    if source is not None and source_doc_ids is not None:
+        _replace_file(manifest_path, [json.dumps(manifest, ensure_ascii=False)])
+
+
 def extract_and_chunk_md(md_path: str, chunking_strategy: str = "page") -> List[Dict[str, Any]]:
     doc_id = os.path.splitext(os.path.basename(md_path))[0]
     print(f"Processing: {md_path}")
@@ -50,12 +103,8 @@ def extract_and_chunk_mds(
         chunks = extract_and_chunk_md(md_path, chunking_strategy)
         all_chunks.extend(chunks)
     if write_to_json:
-        json_path = os.path.join(output_dir, "all_chunks.jsonl")
-        write_mode = "a" if os.path.exists(json_path) else "w"
-        with open(json_path, write_mode, encoding="utf-8") as f:
-            for chunk in all_chunks:
-                json.dump(chunk, f, ensure_ascii=False)
-                f.write("\n")
+        md_doc_ids = [os.path.splitext(os.path.basename(path))[0] for path in md_files]
+        write_chunks_jsonl(os.path.join(output_dir, "all_chunks.jsonl"), all_chunks, "md", md_doc_ids)
     return all_chunks
 
 
@@ -168,13 +217,9 @@ def extract_and_chunk_pdfs(
         all_chunks.extend(chunks)
 
     if write_to_json:
-        # if json file already exists, append to it
-        json_path = os.path.join(output_dir, "all_chunks.jsonl")
-        write_mode = "a" if os.path.exists(json_path) else "w"
-        with open(json_path, write_mode, encoding="utf-8") as f:
-            for chunk in all_chunks:
-                json.dump(chunk, f, ensure_ascii=False)
-                f.write("\n")
+        # if json file already exists, merge into it
+        pdf_doc_ids = [os.path.splitext(os.path.basename(path))[0] for path in pdf_files]
+        write_chunks_jsonl(os.path.join(output_dir, "all_chunks.jsonl"), all_chunks, "pdf", pdf_doc_ids)
     print(f"Extracted {len(all_chunks)} chunks from {len(pdf_files)} PDFs.")
     return all_chunks
 
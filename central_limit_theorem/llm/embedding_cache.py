@@ -0,0 +1,234 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ml_boilerplate_module.llm.nlp_utils import EMBEDDING_MODEL, embed_text
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_MEMORY_ITEMS = 4096
+# Eviction frees down to this fraction of max_bytes so it does not run on every insert
+EVICTION_TARGET = 0.9
+# Hits only record their time in memory; the last_used updates are written once this many are pending
+TOUCH_FLUSH_ITEMS = 1024
+
+CacheKey = Tuple[str, str]
+
+
+def text_key(model: str, text: str) -> CacheKey:
+    return (model, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache in front of an embedding function.
+
+    Embeddings are keyed by ``(model, sha256(text))`` and stored in an SQLite file, with
+    an in-process LRU tier of ``memory_items`` entries in front of it. Once the file's
+    embeddings exceed ``max_bytes`` the least recently used ones are evicted; hits record
+    their time in memory and it is written in batches, so a hit does not cost a write. Instances
+    are callable with the signature of ``embed_text``, so they can be passed as the
+    ``embed_fn`` of ``SqliteVectorDB``; ``embed_many`` fits ``embed_batch_fn``.
+    Returned arrays are read-only. One instance can be shared across threads (e.g. Gradio
+    callbacks): the connection is used under a lock, released while embedding misses.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        embed_fn: Callable[[str], npt.NDArray[np.float64] | None] = embed_text,
+        embed_batch_fn: Callable[[List[str]], npt.NDArray[np.float64]] | None = None,
+        model: str = EMBEDDING_MODEL,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        memory_items: int = DEFAULT_MEMORY_ITEMS,
+    ):
+        self.embed_fn = embed_fn
+        self.embed_batch_fn = embed_batch_fn
+        self.model = model
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[CacheKey, npt.NDArray[np.float64]]" = OrderedDict()
+        self._touched: Dict[CacheKey, float] = {}
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._cursor = self.conn.cursor()
+        self._cursor.execute("PRAGMA journal_mode=WAL")
+        self._cursor.execute("PRAGMA synchronous=NORMAL")
+        self._cursor.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )"""
+        )
+        self._cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self.conn.commit()
+        self.disk_bytes = self._cursor.execute(
+            "SELECT COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def __call__(self, text: str) -> npt.NDArray[np.float64] | None:
+        key = text_key(self.model, text)
+        with self._lock:
+            embedding = self._lookup([key]).get(key)
+            if embedding is not None:
+                return embedding
+            self.misses += 1
+        embedding = self.embed_fn(text)
+        if embedding is None:
+            return None
+        with self._lock:
+            return self._store({key: np.array(embedding, dtype=np.float64)})[key]
+
+    def embed_many(self, texts: List[str]) -> npt.NDArray[np.float64]:
+        """Embed ``texts`` (rows in order), calling the wrapped function for misses only."""
+        keys = [text_key(self.model, text) for text in texts]
+        with self._lock:
+            found = self._lookup(list(dict.fromkeys(keys)))
+            missing: Dict[CacheKey, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in found:
+                    missing[key] = text
+            self.misses += len(missing)
+        if missing:
+            texts_to_embed = list(missing.values())
+            if self.embed_batch_fn is not None:
+                computed = list(np.array(self.embed_batch_fn(texts_to_embed), dtype=np.float64))
+            else:
+                computed = [self.embed_fn(text) for text in texts_to_embed]
+            if any(embedding is None for embedding in computed):
+                raise ValueError("Embedding is None")
+            new_embeddings = {key: np.array(e, dtype=np.float64) for key, e in zip(missing, computed)}
+            with self._lock:
+                found.update(self._store(new_embeddings))
+        if not keys:
+            return np.empty((0, 0), dtype=np.float64)
+        return np.vstack([found[key] for key in keys])
+
+    def _remember(self, key: CacheKey, embedding: npt.NDArray[np.float64]) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[CacheKey]) -> Dict[CacheKey, npt.NDArray[np.float64]]:
+        found: Dict[CacheKey, npt.NDArray[np.float64]] = {}
+        on_disk = []
+        now = time.time()
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+                self._touched[key] = now
+                self.memory_hits += 1
+            else:
+                on_disk.append(key)
+        # Stay under SQLite's default limit of 999 bound variables per statement
+        for start in range(0, len(on_disk), 900):
+            batch = on_disk[start : start + 900]
+            placeholders = ",".join("?" * len(batch))
+            self._cursor.execute(
+                "SELECT text_hash, embedding FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model, *(text_hash for _, text_hash in batch)],
+            )
+            for text_hash, blob in self._cursor.fetchall():
+                embedding = np.frombuffer(blob, dtype=np.float64)
+                found[(self.model, text_hash)] = embedding
+                self._remember((self.model, text_hash), embedding)
+                self._touched[(self.model, text_hash)] = now
+        if len(self._touched) >= TOUCH_FLUSH_ITEMS:
+            self._flush_touched()
+            self.conn.commit()
+        self.hits += len(found)
+        return found
+
+    def _flush_touched(self) -> None:
+        self._cursor.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+            [(last_used, model, text_hash) for (model, text_hash), last_used in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _stored_bytes(self, keys: List[CacheKey]) -> int:
+        stored = 0
+        for start in range(0, len(keys), 900):
+            batch = keys[start : start + 900]
+            placeholders = ",".join("?" * len(batch))
+            self._cursor.execute(
+                "SELECT COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model, *(text_hash for _, text_hash in batch)],
+            )
+            stored += self._cursor.fetchone()[0]
+        return stored
+
+    def _store(
+        self, embeddings: Dict[CacheKey, npt.NDArray[np.float64]]
+    ) -> Dict[CacheKey, npt.NDArray[np.float64]]:
+        now = time.time()
+        rows = []
+        for (model, text_hash), embedding in embeddings.items():
+            embedding.flags.writeable = False
+            self._remember((model, text_hash), embedding)
+            self._touched.pop((model, text_hash), None)
+            rows.append((model, text_hash, embedding.tobytes(), now))
+        # Another thread may have stored the same text while this one was embedding it
+        replaced_bytes = self._stored_bytes(list(embeddings))
+        self._cursor.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, embedding, last_used) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self.disk_bytes += sum(len(row[2]) for row in rows) - replaced_bytes
+        # Eviction orders by last_used, so pending hits are written first
+        self._flush_touched()
+        self._evict()
+        self.conn.commit()
+        return embeddings
+
+    def _evict(self) -> None:
+        if self.max_bytes is None or self.disk_bytes <= self.max_bytes:
+            return
+        target = EVICTION_TARGET * self.max_bytes
+        evicted = []
+        # Read lazily, oldest first, and stop as soon as enough has been freed
+        reader = self.conn.execute(
+            "SELECT model, text_hash, LENGTH(embedding) FROM embeddings ORDER BY last_used"
+        )
+        for model, text_hash, size in reader:
+            if self.disk_bytes <= target:
+                break
+            evicted.append((model, text_hash))
+            self.disk_bytes -= size
+        reader.close()
+        for key in evicted:
+            self._memory.pop(key, None)
+        self._cursor.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", evicted)
+        self.evictions += len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_bytes": self.disk_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._touched:
+                self._flush_touched()
+                self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,163 @@
+import os
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx")
+
+
+def length_buckets(lengths: List[int], batch_size: int) -> List[List[int]]:
+    """Group indices into batches of at most ``batch_size`` texts of similar length.
+
+    Indices are sorted by length, so each batch only pads to its own longest text.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[start : start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def masked_mean_pool(hidden: npt.NDArray[Any], attention_mask: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+    """Mean of the token embeddings in ``hidden`` (batch, tokens, dim), ignoring padding tokens."""
+    mask = attention_mask[..., None].astype(np.float32)
+    counts = np.maximum(mask.sum(axis=1), 1e-9)
+    return ((hidden * mask).sum(axis=1) / counts).astype(np.float32)
+
+
+class LocalEmbedder:
+    """Offline embedding provider backed by a local transformer model.
+
+    Instances are callable with the signature of ``nlp_utils.embed_text``, so they can be
+    passed as the ``embed_fn`` of ``SqliteVectorDB`` or ``EmbeddingCache``; ``embed_many``
+    fits ``embed_batch_fn``. Texts are tokenized once and batched in length buckets, so
+    every batch is only padded to its own longest text; embeddings are attention-mask
+    mean pooled and (by default) L2-normalized like sentence-transformers does.
+
+    ``backend="onnx"`` exports the model once to ``onnx_path`` and runs it with ONNX
+    Runtime; ``quantize`` applies dynamic int8 quantization to the linear layers (of the
+    torch model or the exported graph) for faster CPU inference. ``num_threads`` caps the
+    threads of the ONNX session; torch's thread pool is process-wide, so for the torch
+    backend it is left to the caller (``torch.set_num_threads``).
+
+    Vectors from different models are not comparable: a store must be built and queried
+    with the same embedder (use ``model_name`` as the ``EmbeddingCache`` model).
+    """
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_EMBEDDING_MODEL,
+        tokenizer: Any = None,
+        model: Any = None,
+        batch_size: int = 64,
+        max_length: int = 256,
+        num_threads: int | None = None,
+        backend: str = "torch",
+        quantize: bool = False,
+        onnx_path: str | None = None,
+        normalize: bool = True,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}, expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_name)
+        self.model = model or AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.backend = backend
+        self.normalize = normalize
+        self._session = None
+        if backend == "onnx":
+            self._session = self._onnx_session(onnx_path, quantize)
+        elif quantize:
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+    @classmethod
+    def from_retrieval_module(cls, module: Any, **kwargs: Any) -> "LocalEmbedder":
+        """Reuse the tokenizer and model already loaded by a ``RetrievalModule``."""
+        return cls(tokenizer=module.tokenizer, model=module.model, **kwargs)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.config.hidden_size
+
+    def _onnx_session(self, onnx_path: str | None, quantize: bool) -> Any:
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx backend requires onnxruntime; use backend='torch' instead") from e
+        # Exported once (by default into the working directory) and reused on later runs
+        onnx_path = onnx_path or f"{self.model_name.replace('/', '_')}.onnx"
+        if not os.path.exists(onnx_path):
+            self._export_onnx(onnx_path)
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantized_path = onnx_path.replace(".onnx", ".int8.onnx")
+            if not os.path.exists(quantized_path):
+                quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+            onnx_path = quantized_path
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        return onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def _export_onnx(self, onnx_path: str) -> None:
+        sample = self.tokenizer(["export"], return_tensors="pt")
+        input_names = list(sample.keys())
+        dynamic_axes: Dict[str, Dict[int, str]] = {name: {0: "batch", 1: "tokens"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+        # Not inference_mode: tracing for export cannot record inference tensors
+        with torch.no_grad():
+            torch.onnx.export(
+                self.model,
+                (dict(sample),),
+                onnx_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+            )
+
+    def _forward(self, features: Dict[str, List[List[int]]]) -> npt.NDArray[np.float32]:
+        """Mean-pooled embeddings of one batch of already tokenized texts (padded here)."""
+        if self._session is not None:
+            inputs = self.tokenizer.pad(features, return_tensors="np")
+            feed = {i.name: inputs[i.name].astype(np.int64) for i in self._session.get_inputs()}
+            hidden = self._session.run(["last_hidden_state"], feed)[0]
+            return masked_mean_pool(hidden, inputs["attention_mask"])
+        inputs = self.tokenizer.pad(features, return_tensors="pt")
+        with torch.inference_mode():
+            hidden = self.model(**inputs).last_hidden_state
+        return masked_mean_pool(hidden.float().cpu().numpy(), inputs["attention_mask"].cpu().numpy())
+
+    def iter_embed(self, texts: List[str]) -> Iterator[Tuple[List[int], npt.NDArray[np.float32]]]:
+        """Embed ``texts`` one length bucket at a time.
+
+        Yields:
+            Indices into ``texts`` of the batch and their embeddings, shortest texts first
+        """
+        # Tokenized once, unpadded; each bucket is only padded to its own longest text
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        for batch in length_buckets(lengths, self.batch_size):
+            vectors = self._forward({name: [values[i] for i in batch] for name, values in encoded.items()})
+            if self.normalize:
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            yield batch, vectors
+
+    def embed_many(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        """Embed ``texts``; rows follow the order of ``texts``."""
+        out = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if texts:
+            for batch, vectors in self.iter_embed(texts):
+                out[batch] = vectors
+        return out
+
+    def __call__(self, text: str) -> npt.NDArray[np.float64] | None:
+        return self.embed_many([text])[0].astype(np.float64)
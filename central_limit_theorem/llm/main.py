@@ -9,7 +9,12 @@ from ml_boilerplate_module.file_utils import read_all_text_files_recursive
 from ml_boilerplate_module.llm.client_factory import get_llm_client
 from ml_boilerplate_module.llm.groq_client import GroqAIClient
 from ml_boilerplate_module.llm.interfaces import Message
-from ml_boilerplate_module.llm.nlp_utils import chunk_text_by_tokens, cosine_similarity, embed_text
+from ml_boilerplate_module.llm.nlp_utils import (
+    chunk_text_by_tokens,
+    cosine_similarity,
+    embed_text,
+    embed_texts,
+)
 from ml_boilerplate_module.llm.openai_client import OpenAIClient
 from ml_boilerplate_module.llm.output_formats import research_assistant_2_json_format
 from ml_boilerplate_module.llm.prompts import (
@@ -113,14 +118,14 @@ def main3() -> None:
     chunks = []
     for file_content in repo_context.values():
         chunks.extend(chunk_text_by_tokens(file_content))
+    embedding_matrix = embed_texts(chunks)
     embeddings = [
         {
             "text": chunk,
-            "embedding": embed_text(chunk),
+            "embedding": embedding,
         }
-        for chunk in chunks
+        for chunk, embedding in zip(chunks, embedding_matrix)
     ]
-    embedding_matrix = np.array([embedding["embedding"] for embedding in embeddings])
     user_message_4_embedding = embed_text(user_message_4)
     similarity_scores = cosine_similarity(embedding_matrix, user_message_4_embedding)  # type: ignore
     print(np.argsort(similarity_scores)[-10:][::-1])
@@ -279,6 +284,7 @@ def main7() -> None:
     vector_db = SqliteVectorDB(
         db_path=r"D:\projects\machine_learning_workspace\ml-boilerplate\dataset/vector_db.db",  # TODO: change to relative path
         embed_fn=embed_text,
+        embed_batch_fn=embed_texts,
     )
     # vector_db.load_documents(
     #     json_path=r"D:\projects\machine_learning_workspace\ml-boilerplate\dataset/repository/company/md_extractions/all_chunks.jsonl"
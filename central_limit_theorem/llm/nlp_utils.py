@@ -1,7 +1,11 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, List
 
 import numpy as np
 import numpy.typing as npt
+import openai
 import tiktoken
 from nltk.tokenize import sent_tokenize, word_tokenize  # type: ignore
 from openai import embeddings
@@ -22,6 +26,17 @@ def split_words(text: str) -> Any:
 
 encoding = tiktoken.get_encoding("cl100k_base")  # For GPT-4o, GPT-4, GPT-3.5-turbo
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Per-request limits of the embeddings endpoint
+EMBEDDING_MAX_BATCH_ITEMS = 2048
+EMBEDDING_MAX_BATCH_TOKENS = 300_000
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
 
 def num_tokens(text: str) -> int:
     return len(encoding.encode(text))
@@ -46,17 +61,84 @@ def chunk_text_by_tokens(text: str, max_tokens: int = 256) -> List[str]:
 
 
 def embed_text(text: str) -> npt.NDArray[np.float64] | None:
-    response = embeddings.create(input=text, model="text-embedding-3-small")
+    response = embeddings.create(input=text, model=EMBEDDING_MODEL)
     return np.array(response.data[0].embedding) if response.data else None
 
 
+def batch_by_budget(
+    texts: List[str],
+    max_items: int = EMBEDDING_MAX_BATCH_ITEMS,
+    max_tokens: int = EMBEDDING_MAX_BATCH_TOKENS,
+) -> List[List[int]]:
+    """Group the indices of ``texts`` into consecutive batches within an item and token budget."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = num_tokens(text)
+        if current and (len(current) == max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _create_embeddings(
+    texts: List[str], max_retries: int = 6, initial_backoff: float = 1.0
+) -> npt.NDArray[np.float32]:
+    for attempt in range(max_retries + 1):
+        try:
+            response = embeddings.create(input=texts, model=EMBEDDING_MODEL)
+            break
+        except _RETRYABLE_ERRORS:
+            if attempt == max_retries:
+                raise
+            # Exponential backoff with jitter so concurrent batches do not retry in lockstep
+            time.sleep(initial_backoff * 2**attempt * (1 + random.random()))
+    ordered = sorted(response.data, key=lambda item: item.index)
+    return np.array([item.embedding for item in ordered], dtype=np.float32)
+
+
+def embed_texts(
+    texts: List[str],
+    max_items: int = EMBEDDING_MAX_BATCH_ITEMS,
+    max_tokens: int = EMBEDDING_MAX_BATCH_TOKENS,
+    max_concurrency: int = 4,
+    max_retries: int = 6,
+) -> npt.NDArray[np.float32]:
+    """Embed many texts with as few requests as the endpoint limits allow.
+
+    Texts are packed into batches of at most ``max_items`` inputs and ``max_tokens``
+    tokens, up to ``max_concurrency`` batches are in flight at once, and rate-limit or
+    transient errors are retried with exponential backoff.
+
+    Returns:
+        ``(len(texts), dim)`` float32 matrix whose rows follow the order of ``texts``
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    batches = batch_by_budget(texts, max_items, max_tokens)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches)))) as executor:
+        results = executor.map(
+            lambda batch: _create_embeddings([texts[i] for i in batch], max_retries), batches
+        )
+        matrix: npt.NDArray[np.float32] | None = None
+        for batch, batch_embeddings in zip(batches, results):
+            if matrix is None:
+                matrix = np.empty((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+            matrix[batch] = batch_embeddings
+    assert matrix is not None
+    return matrix
+
+
 def cosine_similarity(a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]) -> Any:
     return (a @ b) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b))
 
 
 def euclidean_distance(a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]) -> Any:
-    print("Norm of a: ", np.linalg.norm(a, axis=1))
-    print("Norm of b: ", np.linalg.norm(b))
     return np.linalg.norm(a - b, axis=1)
 
 
@@ -64,6 +146,12 @@ def inner_product(a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]) -> Any
     return a @ b
 
 
+def l2_normalize(a: npt.NDArray[np.float64]) -> Any:
+    """Scale vectors (rows of a matrix) to unit length; zero vectors are left unchanged."""
+    norms = np.linalg.norm(a, axis=-1, keepdims=True)
+    return a / np.where(norms > 0, norms, 1.0)
+
+
 if __name__ == "__main__":
     load_config()
     given_text = "Hello, how are you?"
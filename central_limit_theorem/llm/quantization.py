@@ -0,0 +1,185 @@
+import io
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+import numpy as np
+import numpy.typing as npt
+
+from ml_boilerplate_module.llm.ann_index import _assign, kmeans
+
+QUANTIZATION_MODES = ("float16", "int8", "pq")
+
+
+class Quantizer(ABC):
+    """Compact code for embedding rows; scores are approximate inner products."""
+
+    kind: str
+    code_dtype: np.dtype
+
+    @abstractmethod
+    def encode(self, vectors: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        pass
+
+    @abstractmethod
+    def decode(self, codes: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+        pass
+
+    @abstractmethod
+    def _arrays(self) -> Dict[str, npt.NDArray[Any]]:
+        pass
+
+    def scores(
+        self, codes: npt.NDArray[Any], query: npt.NDArray[Any], batch_size: int = 65536
+    ) -> npt.NDArray[np.float32]:
+        """Inner products of ``query`` with every coded row, decoding ``batch_size`` rows at a time."""
+        query = np.asarray(query, dtype=np.float32)
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], batch_size):
+            out[start : start + batch_size] = self.decode(codes[start : start + batch_size]) @ query
+        return out
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(buffer, kind=self.kind, **self._arrays())
+        return buffer.getvalue()
+
+
+class Float16Quantizer(Quantizer):
+    kind = "float16"
+    code_dtype = np.dtype(np.float16)
+
+    def encode(self, vectors: npt.NDArray[Any]) -> npt.NDArray[np.float16]:
+        return np.asarray(vectors, dtype=np.float16)
+
+    def decode(self, codes: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+        return np.asarray(codes, dtype=np.float32)
+
+    def _arrays(self) -> Dict[str, npt.NDArray[Any]]:
+        return {}
+
+
+class Int8Quantizer(Quantizer):
+    """Per-dimension affine quantization to 256 levels between the trained min and max."""
+
+    kind = "int8"
+    code_dtype = np.dtype(np.int8)
+
+    def __init__(self, low: npt.NDArray[np.float32], scale: npt.NDArray[np.float32]):
+        self.low = np.asarray(low, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def train(cls, vectors: npt.NDArray[Any]) -> "Int8Quantizer":
+        low = vectors.min(axis=0)
+        scale = (vectors.max(axis=0) - low) / 255
+        return cls(low, np.where(scale > 0, scale, 1.0))
+
+    def encode(self, vectors: npt.NDArray[Any]) -> npt.NDArray[np.int8]:
+        levels = np.rint((np.asarray(vectors, dtype=np.float32) - self.low) / self.scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def decode(self, codes: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+        return (codes.astype(np.float32) + 128) * self.scale + self.low
+
+    def scores(
+        self, codes: npt.NDArray[Any], query: npt.NDArray[Any], batch_size: int = 65536
+    ) -> npt.NDArray[np.float32]:
+        # x.q = codes.(scale * q) + (low + 128 * scale).q, so rows never need decoding
+        query = np.asarray(query, dtype=np.float32)
+        scaled_query = self.scale * query
+        offset = np.float32((self.low + 128 * self.scale) @ query)
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], batch_size):
+            batch = codes[start : start + batch_size]
+            out[start : start + batch_size] = batch.astype(np.float32) @ scaled_query
+        return out + offset
+
+    def _arrays(self) -> Dict[str, npt.NDArray[Any]]:
+        return {"low": self.low, "scale": self.scale}
+
+
+class ProductQuantizer(Quantizer):
+    """Splits vectors into ``m`` sub-vectors, each coded by one of 256 k-means centroids."""
+
+    kind = "pq"
+    code_dtype = np.dtype(np.uint8)
+
+    def __init__(self, codebooks: npt.NDArray[np.float32]):
+        # (m, 256, dim // m)
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)
+
+    @property
+    def m(self) -> int:
+        return self.codebooks.shape[0]
+
+    @classmethod
+    def train(
+        cls, vectors: npt.NDArray[Any], m: int | None = None, n_iter: int = 10, seed: int | None = 0
+    ) -> "ProductQuantizer":
+        """Train one 256-centroid codebook per sub-space.
+
+        Args:
+            vectors: Training vectors
+            m: Number of sub-spaces (bytes per code), must divide the dimension; defaults to ``dim // 8``
+            n_iter: k-means iterations per sub-space
+            seed: Seed for the k-means initialisation
+        """
+        dim = vectors.shape[1]
+        m = m or max(1, dim // 8)
+        if dim % m:
+            raise ValueError(f"Dimension {dim} is not divisible by m={m}")
+        if vectors.shape[0] < 256:
+            raise ValueError("Product quantization needs at least 256 training vectors")
+        rng = np.random.default_rng(seed)
+        sub_vectors = np.asarray(vectors, dtype=np.float32).reshape(vectors.shape[0], m, dim // m)
+        codebooks = [kmeans(sub_vectors[:, j], 256, n_iter, rng, l2=True) for j in range(m)]
+        return cls(np.stack(codebooks))
+
+    def encode(self, vectors: npt.NDArray[Any]) -> npt.NDArray[np.uint8]:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        sub_vectors = vectors.reshape(vectors.shape[0], self.m, -1)
+        codes = np.empty((vectors.shape[0], self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = _assign(sub_vectors[:, j], self.codebooks[j], l2=True)
+        return codes
+
+    def decode(self, codes: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+        codes = np.atleast_2d(codes)
+        return self.codebooks[np.arange(self.m), codes].reshape(codes.shape[0], -1)
+
+    def scores(
+        self, codes: npt.NDArray[Any], query: npt.NDArray[Any], batch_size: int = 65536
+    ) -> npt.NDArray[np.float32]:
+        # Asymmetric distance: one (m, 256) table of sub-vector products, then m lookups per row
+        sub_queries = np.asarray(query, dtype=np.float32).reshape(self.m, -1)
+        tables = np.einsum("jkd,jd->jk", self.codebooks, sub_queries)
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], batch_size):
+            batch = codes[start : start + batch_size]
+            out[start : start + batch_size] = tables[np.arange(self.m), batch].sum(axis=1)
+        return out
+
+    def _arrays(self) -> Dict[str, npt.NDArray[Any]]:
+        return {"codebooks": self.codebooks}
+
+
+def train_quantizer(mode: str, vectors: npt.NDArray[Any], **kwargs: Any) -> Quantizer:
+    if mode == "float16":
+        return Float16Quantizer()
+    if mode == "int8":
+        return Int8Quantizer.train(vectors)
+    if mode == "pq":
+        return ProductQuantizer.train(vectors, **kwargs)
+    raise ValueError(f"Unknown quantization mode: {mode}, expected one of {QUANTIZATION_MODES}")
+
+
+def quantizer_from_bytes(data: bytes) -> Quantizer:
+    with np.load(io.BytesIO(data)) as arrays:
+        kind = str(arrays["kind"])
+        if kind == "float16":
+            return Float16Quantizer()
+        if kind == "int8":
+            return Int8Quantizer(arrays["low"], arrays["scale"])
+        if kind == "pq":
+            return ProductQuantizer(arrays["codebooks"])
+    raise ValueError(f"Unknown quantizer: {kind}")
@@ -1,41 +1,227 @@
+import os
+import sqlite3
+
 import faiss
-import torch
+import numpy as np
 from transformers import AutoModel, AutoTokenizer
 
+from ml_boilerplate_module.llm.local_embeddings import LocalEmbedder
+
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
 
 class RetrievalModule:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
+    """Dense retrieval over a FAISS index with an SQLite document store.
+
+    Documents get stable ids (the store's row ids), and the index maps vectors to those
+    ids, so documents can be removed or updated in place. With a ``db_path`` the store is
+    the SQLite file and the index is persisted next to it (``db_path + ".faiss"``), so a
+    restart loads the index instead of re-encoding the corpus; without one both live in
+    memory. The index starts as an exact ``IndexFlatL2`` and, for ``index_type`` ``"ivf"``
+    or ``"hnsw"``, is rebuilt as that type once it holds ``switch_threshold`` vectors.
+    """
+
+    def __init__(
+        self,
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        batch_size=32,
+        db_path=None,
+        index_type="flat",
+        switch_threshold=50_000,
+        nprobe=16,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}, expected one of {INDEX_TYPES}")
         # Load pre-trained model and tokenizer
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModel.from_pretrained(model_name)
-
-        # Initialize the FAISS index (flat index)
+        # Length-bucketed micro-batches with attention-mask mean pooling; vectors stay unnormalized for L2
+        self.embedder = LocalEmbedder(
+            model_name, tokenizer=self.tokenizer, model=self.model, batch_size=batch_size, normalize=False
+        )
         self.dimension = 384  # all-MiniLM-L6-v2 output vector dimension
-        self.index = faiss.IndexFlatL2(self.dimension)
+        self.index_type = index_type
+        self.switch_threshold = switch_threshold
+        self.nprobe = nprobe
+
+        # Raw documents, keyed by the ids used in the index
+        self.conn = sqlite3.connect(db_path or ":memory:")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, text TEXT NOT NULL)")
+        # Ids whose text changed since the index was last saved; their saved vectors are stale
+        self.conn.execute("CREATE TABLE IF NOT EXISTS unsaved_updates (id INTEGER PRIMARY KEY)")
+        self.conn.commit()
+
+        self._index_path = db_path + ".faiss" if db_path else None
+        if self._index_path and os.path.exists(self._index_path):
+            self.index = faiss.read_index(self._index_path)
+            self._set_nprobe()
+        else:
+            self.index = faiss.IndexIDMap(faiss.IndexFlatL2(self.dimension))
+        self._reconcile_index()
 
-        # Store raw documents for reference
-        self.documents = []
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
 
     def encode(self, texts):
-        """Encode texts into vectors using the transformer model."""
-        inputs = self.tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            # Mean pooling
-            embeddings = outputs.last_hidden_state.mean(dim=1)
-        return embeddings.cpu().numpy()
+        """Encode texts into vectors using the transformer model, in the order of ``texts``."""
+        return self.embedder.embed_many(texts)
+
+    def iter_encode(self, texts):
+        """Stream ``(indices, vectors)`` micro-batches of ``texts``, grouped by length, not input order."""
+        return self.embedder.iter_embed(texts)
+
+    def _index_ids(self):
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is None:
+            return faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        invlists = ivf.invlists
+        lists = [
+            faiss.rev_swig_ptr(invlists.get_ids(i), invlists.list_size(i)).copy()
+            for i in range(ivf.nlist)
+            if invlists.list_size(i)
+        ]
+        return np.concatenate(lists).astype(np.int64) if lists else np.empty(0, dtype=np.int64)
+
+    def _reconcile_index(self):
+        """Bring a loaded index in line with the document store.
+
+        The store is committed on every change but the index only on ``save``, so after a
+        crash or a missing ``close`` the index can lack new documents, still hold removed
+        ones, or hold old vectors of updated ones. Those are re-encoded or dropped here; a
+        store without a saved index is fully re-encoded once.
+        """
+        stored = np.array([row[0] for row in self.conn.execute("SELECT id FROM documents")], dtype=np.int64)
+        updated = np.array(
+            [row[0] for row in self.conn.execute("SELECT id FROM unsaved_updates")], dtype=np.int64
+        )
+        indexed = self._index_ids()
+        stale = np.union1d(np.setdiff1d(indexed, stored), np.intersect1d(updated, indexed))
+        missing = np.union1d(np.setdiff1d(stored, indexed), np.intersect1d(updated, stored))
+        changed = len(missing) > 0
+        if len(stale):
+            try:
+                self.index.remove_ids(stale)
+                changed = True
+            except RuntimeError:
+                # HNSW cannot remove vectors; retrieve skips ids that are no longer in the store
+                missing = np.setdiff1d(missing, updated)
+        if len(missing):
+            texts = {}
+            # Stay under SQLite's default limit of 999 bound variables per statement
+            for start in range(0, len(missing), 900):
+                batch = [int(i) for i in missing[start : start + 900]]
+                placeholders = ",".join("?" * len(batch))
+                texts.update(
+                    self.conn.execute(f"SELECT id, text FROM documents WHERE id IN ({placeholders})", batch)
+                )
+            self._add_vectors([texts[int(i)] for i in missing], missing)
+        if changed:
+            self.save()
+
+    def _add_vectors(self, texts, ids):
+        for batch, vectors in self.iter_encode(texts):
+            self.index.add_with_ids(vectors, ids[batch])
+        self._maybe_switch_index()
+
+    def _set_nprobe(self):
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+
+    def _maybe_switch_index(self):
+        """Rebuild the flat index as IVF or HNSW once it reaches ``switch_threshold`` vectors."""
+        if self.index_type == "flat" or self.index.ntotal < self.switch_threshold:
+            return
+        if not isinstance(self.index, faiss.IndexIDMap) or not isinstance(
+            faiss.downcast_index(self.index.index), faiss.IndexFlat
+        ):
+            return
+        ids = faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        if self.index_type == "ivf":
+            # sqrt(n) lists keeps well above the ~39 training points per centroid faiss asks for
+            n_lists = max(1, int(np.sqrt(len(ids))))
+            quantizer = faiss.IndexFlatL2(self.dimension)
+            index = faiss.IndexIVFFlat(quantizer, self.dimension, n_lists)
+            index.train(vectors)
+        else:
+            index = faiss.IndexIDMap(faiss.IndexHNSWFlat(self.dimension, 32))
+        index.add_with_ids(vectors, ids)
+        self.index = index
+        self._set_nprobe()
 
     def add_documents(self, docs):
-        """Add documents to the FAISS index."""
-        vectors = self.encode(docs)
-        self.index.add(vectors)
-        self.documents.extend(docs)  # Save the mapping of raw documents
+        """Add documents to the store and the FAISS index.
+
+        Returns:
+            The ids assigned to ``docs``, in order
+        """
+        ids = []
+        for doc in docs:
+            ids.append(self.conn.execute("INSERT INTO documents (text) VALUES (?)", (doc,)).lastrowid)
+        self.conn.commit()
+        ids = np.array(ids, dtype=np.int64)
+        self._add_vectors(docs, ids)
+        return ids.tolist()
+
+    def remove_documents(self, ids):
+        """Remove documents by id from the store and the index."""
+        ids = np.asarray(ids, dtype=np.int64)
+        self.conn.executemany("DELETE FROM documents WHERE id = ?", [(int(i),) for i in ids])
+        self.conn.commit()
+        try:
+            self.index.remove_ids(ids)
+        except RuntimeError:
+            # HNSW cannot remove vectors; retrieve skips ids that are no longer in the store
+            pass
+
+    def update_documents(self, ids, docs):
+        """Replace the text (and vector) of existing documents, keeping their ids."""
+        ids = np.asarray(ids, dtype=np.int64)
+        try:
+            self.index.remove_ids(ids)
+        except RuntimeError:
+            raise ValueError("Documents cannot be updated in an HNSW index; rebuild it instead") from None
+        self.conn.executemany(
+            "UPDATE documents SET text = ? WHERE id = ?", [(doc, int(i)) for doc, i in zip(docs, ids)]
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO unsaved_updates (id) VALUES (?)", [(int(i),) for i in ids]
+        )
+        self.conn.commit()
+        self._add_vectors(docs, ids)
 
     def retrieve(self, query, top_k=5):
         """Retrieve top-k documents matching the query."""
         query_vector = self.encode([query])
-        distances, indices = self.index.search(query_vector, top_k)
-        return [(self.documents[idx], distances[0][i]) for i, idx in enumerate(indices[0])]
+        # Over-fetch by the number of vectors whose documents were removed but are still indexed
+        stale = max(0, self.index.ntotal - len(self))
+        distances, indices = self.index.search(query_vector, top_k + stale)
+        found = [(int(idx), float(distance)) for idx, distance in zip(indices[0], distances[0]) if idx != -1]
+        placeholders = ",".join("?" * len(found))
+        texts = dict(
+            self.conn.execute(
+                f"SELECT id, text FROM documents WHERE id IN ({placeholders})", [idx for idx, _ in found]
+            )
+        )
+        return [(texts[idx], distance) for idx, distance in found if idx in texts][:top_k]
+
+    def save(self):
+        """Write the index next to the document store (no-op for an in-memory module)."""
+        self.conn.commit()
+        if self._index_path is None:
+            return
+        # Write to a temporary file first so a crash never leaves a truncated index behind
+        tmp_path = self._index_path + ".tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, self._index_path)
+        self.conn.execute("DELETE FROM unsaved_updates")
+        self.conn.commit()
+
+    def close(self):
+        self.save()
+        self.conn.close()
 
 
 # 📋 Usage
@@ -1,8 +1,12 @@
+import hashlib
 import json
+import os
+import re
 import sqlite3
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import chromadb
 import numpy as np
@@ -11,8 +15,130 @@ from chromadb.api.types import QueryResult
 from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 
 from ml_boilerplate_module.config import load_config
+from ml_boilerplate_module.llm.ann_index import IVFFlatIndex
+from ml_boilerplate_module.llm.bm25 import BM25Index, reciprocal_rank_fusion
 from ml_boilerplate_module.llm.doc_preprocessor import extract_and_chunk_mds, extract_and_chunk_pdfs
-from ml_boilerplate_module.llm.nlp_utils import embed_text, inner_product
+from ml_boilerplate_module.llm.nlp_utils import embed_text, embed_texts, inner_product, l2_normalize
+from ml_boilerplate_module.llm.quantization import Quantizer, quantizer_from_bytes, train_quantizer
+
+METRICS = ("dot", "cosine", "l2")
+# Chunk fields copied out of the JSON metadata into indexed columns
+FILTER_COLUMNS = ("doc_id", "page_number", "chunk_id")
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_INSERT_VECTOR = (
+    "INSERT INTO vectors (embedding, metadata, embedding_full, doc_id, page_number, chunk_id, content_hash) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_UPDATE_VECTOR = (
+    "UPDATE vectors SET embedding = ?, metadata = ?, embedding_full = ?, doc_id = ?, page_number = ?, "
+    "chunk_id = ?, content_hash = ? WHERE id = ?"
+)
+
+
+def top_k(scores: npt.NDArray[Any], k: int) -> npt.NDArray[np.intp]:
+    """Indices of the k largest scores along the last axis, best first.
+
+    Uses ``argpartition`` (linear time) and only sorts the k selected scores.
+    """
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def _iter_chunk_batches(json_path: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    with open(json_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _filter_values(chunk: Any) -> Tuple[Any, ...]:
+    if not isinstance(chunk, dict):
+        return (None,) * len(FILTER_COLUMNS)
+    return tuple(chunk.get(column) for column in FILTER_COLUMNS)
+
+
+def _content_hash(chunk: Any) -> str | None:
+    if not isinstance(chunk, dict):
+        return None
+    canonical = json.dumps(chunk, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _chunk_row(chunk: Dict[str, Any], code: npt.NDArray[Any], full_blob: bytes | None) -> Tuple[Any, ...]:
+    """Values for ``_INSERT_VECTOR``.
+
+    Metadata is the entire chunk as a JSON string (for context retrieval).
+    """
+    metadata = json.dumps(chunk, ensure_ascii=False)
+    return (code.tobytes(), metadata, full_blob, *_filter_values(chunk), _content_hash(chunk))
+
+
+def metadata_text(metadata: str) -> str:
+    """Chunk text stored in a row's metadata (a JSON chunk, or the raw text of ``add_vector`` rows)."""
+    try:
+        chunk = json.loads(metadata)
+    except ValueError:
+        return metadata
+    return chunk.get("text", "") if isinstance(chunk, dict) else metadata
+
+
+def _where_clause(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Translate a Chroma-style ``where`` filter into SQL over the vectors table.
+
+    Keys are ``doc_id``, ``page_number`` and ``chunk_id`` (indexed columns) or any other
+    top-level chunk field (read from the JSON metadata without an index). Values are
+    literals for equality or ``{"$op": value}`` with ``$eq``, ``$ne``, ``$gt``, ``$gte``,
+    ``$lt``, ``$lte``, ``$in``, ``$nin``, or ``$contains`` for list fields such as
+    ``element_types``. All conditions must hold.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    for key, condition in where.items():
+        if not re.fullmatch(r"\w+", key):
+            raise ValueError(f"Invalid filter field: {key}")
+        column = key
+        if key not in FILTER_COLUMNS:
+            column = f"(CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.{key}') END)"
+        conditions = condition if isinstance(condition, dict) else {"$eq": condition}
+        for operator, value in conditions.items():
+            if operator in _COMPARISONS:
+                clauses.append(f"{column} {_COMPARISONS[operator]} ?")
+                params.append(value)
+            elif operator in ("$in", "$nin"):
+                values = list(value)
+                negation = "NOT " if operator == "$nin" else ""
+                clauses.append(f"{column} {negation}IN ({','.join('?' * len(values))})")
+                params.extend(values)
+            elif operator == "$contains":
+                clauses.append(
+                    "(CASE WHEN json_valid(metadata) THEN EXISTS "
+                    f"(SELECT 1 FROM json_each(metadata, '$.{key}') WHERE value = ?) ELSE 0 END)"
+                )
+                params.append(value)
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+    return " AND ".join(clauses) or "1", params
+
+
+def _embed_texts(
+    embed_fn: Callable[[str], npt.NDArray[np.float64] | None],
+    embed_batch_fn: Callable[[List[str]], npt.NDArray[np.float64]] | None,
+    texts: List[str],
+) -> List[npt.NDArray[np.float64] | None]:
+    if embed_batch_fn is not None:
+        return list(np.asarray(embed_batch_fn(texts), dtype=np.float64))
+    return [embed_fn(text) for text in texts]
 
 
 @dataclass
@@ -33,6 +159,10 @@ class VectorDB(ABC):
     @abstractmethod
     def load_documents(self, repo_path: str) -> None: ...
 
+    def search_hybrid(self, user_query: str, k: int = 5) -> List[Tuple[Any, ...]] | QueryResult:
+        """Lexical + dense search; stores without a lexical index fall back to ``search_vectors``."""
+        return self.search_vectors(user_query, k)
+
 
 class ChromaVectorDB(VectorDB):
     def __init__(self, db_path: str):
@@ -76,10 +206,13 @@ class ChromaVectorDB(VectorDB):
                 metadata_str = json.dumps(chunk, ensure_ascii=False)
                 self.add_vector(metadata=metadata_str)
 
-    def search_vectors(self, user_query: str, k: int = 5) -> List[Tuple[int, float, str]] | QueryResult:
+    def search_vectors(
+        self, user_query: str, k: int = 5, where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[int, float, str]] | QueryResult:
         results = self._collection.query(
             query_texts=[user_query],
             n_results=k,
+            where=where,
             include=["embeddings", "documents", "metadatas", "distances"],
         )
         return results
@@ -90,19 +223,137 @@ class ChromaVectorDB(VectorDB):
 
 # Implement VectorDB using SQLITE
 class SqliteVectorDB(VectorDB):
-    def __init__(self, db_path: str, embed_fn: Callable[[str], npt.NDArray[np.float64] | None]):
+    def __init__(
+        self,
+        db_path: str,
+        embed_fn: Callable[[str], npt.NDArray[np.float64] | None],
+        dtype: npt.DTypeLike = np.float64,
+        embed_batch_fn: Callable[[List[str]], npt.NDArray[np.float64]] | None = None,
+        ann: bool = False,
+        rescore: int = 4,
+        metric: str = "dot",
+    ):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}, expected one of {METRICS}")
         self.conn = sqlite3.connect(db_path)
         self._cursor = self.conn.cursor()
         self.embed_fn = embed_fn
+        self.embed_batch_fn = embed_batch_fn
+        # Optional IVF index persisted next to the db; searched instead of the full matrix when present
+        self._ann_path = db_path + ".ivf.npz"
+        self.ann_index: IVFFlatIndex | None = None
+        self._ann_dirty = False
+        # Resident copy of the vectors table: rows [0, _size) of _matrix are valid, _ids maps rows to ids
+        self._dtype = np.dtype(dtype)
+        self._matrix: npt.NDArray[Any] | None = None
+        self._ids: npt.NDArray[np.int64] = np.empty(0, dtype=np.int64)
+        # Squared norms of the resident rows, kept for the l2 metric only
+        self._sq_norms: npt.NDArray[np.float64] = np.empty(0, dtype=np.float64)
+        self._size = 0
+        # WAL lets readers run during bulk writes; NORMAL sync is durable at checkpoints under WAL
+        self._cursor.execute("PRAGMA journal_mode=WAL")
+        self._cursor.execute("PRAGMA synchronous=NORMAL")
+        self._cursor.execute("PRAGMA temp_store=MEMORY")
+        self._cursor.execute("PRAGMA cache_size=-65536")
         self._cursor.execute(
             """CREATE TABLE IF NOT EXISTS vectors (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 embedding BLOB NOT NULL,
                 metadata TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                embedding_full BLOB,
+                doc_id TEXT,
+                page_number INTEGER,
+                chunk_id TEXT,
+                content_hash TEXT
             )"""
         )
+        columns = {row[1] for row in self._cursor.execute("PRAGMA table_info(vectors)").fetchall()}
+        if "embedding_full" not in columns:
+            self._cursor.execute("ALTER TABLE vectors ADD COLUMN embedding_full BLOB")
+        if "doc_id" not in columns:
+            self._cursor.execute("ALTER TABLE vectors ADD COLUMN doc_id TEXT")
+            self._cursor.execute("ALTER TABLE vectors ADD COLUMN page_number INTEGER")
+            self._cursor.execute("ALTER TABLE vectors ADD COLUMN chunk_id TEXT")
+            # Backfill the filter columns of existing rows from their JSON metadata
+            self._cursor.execute(
+                """UPDATE vectors SET
+                    doc_id = json_extract(metadata, '$.doc_id'),
+                    page_number = json_extract(metadata, '$.page_number'),
+                    chunk_id = json_extract(metadata, '$.chunk_id')
+                WHERE json_valid(metadata)"""
+            )
+        if "content_hash" not in columns:
+            # Backfilled by the first sync_documents run
+            self._cursor.execute("ALTER TABLE vectors ADD COLUMN content_hash TEXT")
+        for column in FILTER_COLUMNS:
+            self._cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_vectors_{column} ON vectors ({column})")
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS store_info (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+        # Rows re-embedded in place while a saved ANN index was not loaded; reassigned on its next load
+        self._cursor.execute("CREATE TABLE IF NOT EXISTS ann_pending (id INTEGER PRIMARY KEY)")
         self.conn.commit()
+        # With a quantizer, `embedding` holds compact codes and `embedding_full` an optional float32
+        # copy that is only read to rescore the top k * rescore candidates
+        info = dict(self._cursor.execute("SELECT key, value FROM store_info").fetchall())
+        self.quantizer: Quantizer | None = None
+        if "quantizer" in info:
+            self.quantizer = quantizer_from_bytes(info["quantizer"])
+        self._has_full = info.get("full_precision") == "1"
+        self.rescore = rescore
+        # Stores that predate the metric option were always searched by inner product
+        stored_metric = info.get("metric")
+        if stored_metric is None and self._cursor.execute("SELECT 1 FROM vectors LIMIT 1").fetchone():
+            stored_metric = "dot"
+        if stored_metric is not None and stored_metric != metric:
+            raise ValueError(f"Store was created with metric {stored_metric}, got {metric}")
+        if "metric" not in info:
+            self._cursor.execute("INSERT INTO store_info (key, value) VALUES ('metric', ?)", (metric,))
+            self.conn.commit()
+        self.metric = metric
+        # BM25 postings over the chunk text, kept in the same db and transactions as the vectors
+        self.lexical_index = BM25Index(self.conn)
+        self._sync_lexical_index()
+        if ann and os.path.exists(self._ann_path):
+            self.ann_index = IVFFlatIndex.load(self._ann_path)
+            self._reconcile_ann_index()
+
+    def _prepare(self, embeddings: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """Cosine stores and queries are unit-normalized once, so every metric is a plain product."""
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        return l2_normalize(embeddings) if self.metric == "cosine" else embeddings
+
+    def _output_scores(self, scores: npt.NDArray[Any], query_sq_norms: Any) -> npt.NDArray[Any]:
+        # l2 ranks by 2 x.q - |x|^2; report the (negated) distance sqrt(|q|^2 - that)
+        if self.metric == "l2":
+            return -np.sqrt(np.maximum(query_sq_norms - scores, 0))
+        return scores
+
+    def _squared_norms(self, codes: npt.NDArray[Any], batch_size: int = 65536) -> npt.NDArray[np.float64]:
+        sq_norms = np.empty(codes.shape[0], dtype=np.float64)
+        for start in range(0, codes.shape[0], batch_size):
+            vectors = self._as_vectors(codes[start : start + batch_size])
+            sq_norms[start : start + batch_size] = np.einsum("ij,ij->i", vectors, vectors)
+        return sq_norms
+
+    def _encode_rows(
+        self, embeddings: npt.NDArray[np.float64]
+    ) -> Tuple[npt.NDArray[Any], List[bytes | None]]:
+        """Stored rows for ``embeddings`` (raw float64 without a quantizer) and their full-precision blobs."""
+        if self.quantizer is None:
+            return embeddings, [None] * len(embeddings)
+        full: List[bytes | None] = [None] * len(embeddings)
+        if self._has_full:
+            full = [row.tobytes() for row in embeddings.astype(np.float32)]
+        return self.quantizer.encode(embeddings), full
+
+    def _codes_from_blobs(self, blobs: List[bytes]) -> npt.NDArray[Any]:
+        dtype = np.float64 if self.quantizer is None else self.quantizer.code_dtype
+        return np.frombuffer(b"".join(blobs), dtype=dtype).reshape(len(blobs), -1)
+
+    def _as_vectors(self, codes: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        return codes if self.quantizer is None else self.quantizer.decode(codes)
 
     def add_vector(
         self, embedding: npt.NDArray[np.float64] | None = None, metadata: Optional[str] = None
@@ -111,50 +362,468 @@ class SqliteVectorDB(VectorDB):
             if metadata is None:
                 raise ValueError("Metadata is required")
             embedding = self.embed_fn(metadata)
-        self._cursor.execute(
-            "INSERT INTO vectors (embedding, metadata) VALUES (?, ?)",
-            (embedding.tobytes() if embedding is not None else None, metadata),
-        )
+        code, full = None, None
+        if embedding is not None:
+            embedding = self._prepare(embedding)
+            codes, full_blobs = self._encode_rows(embedding[None])
+            code, full = codes[0], full_blobs[0]
+        try:
+            chunk = json.loads(metadata) if metadata is not None else None
+        except ValueError:
+            chunk = None
+        blob = code.tobytes() if code is not None else None
+        row = (blob, metadata, full, *_filter_values(chunk), _content_hash(chunk))
+        self._cursor.execute(_INSERT_VECTOR, row)
+        if metadata is not None and self._cursor.lastrowid is not None:
+            self.lexical_index.add([(self._cursor.lastrowid, metadata_text(metadata))])
         self.conn.commit()
+        if embedding is not None and self._cursor.lastrowid is not None:
+            self._append_to_matrix(self._cursor.lastrowid, code)
+            if self.ann_index is not None:
+                self.ann_index.add([self._cursor.lastrowid], embedding.astype(self.ann_index.centroids.dtype))
+                self._ann_dirty = True
 
-    def search_vectors(self, user_query: str, k: int = 5) -> List[Tuple[int, float, str]] | QueryResult:
-        """Search for k most similar vectors using cosine similarity.
+    def invalidate_cache(self) -> None:
+        """Drop the resident embedding matrix; it is reloaded on the next search."""
+        self._matrix = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._sq_norms = np.empty(0, dtype=np.float64)
+        self._size = 0
+
+    def _load_matrix(self) -> None:
+        self._cursor.execute("SELECT id, embedding FROM vectors ORDER BY id")
+        rows = self._cursor.fetchall()
+        if not rows:
+            self.invalidate_cache()
+            return
+        self._ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        codes = self._codes_from_blobs([row[1] for row in rows])
+        # Quantized codes stay in their compact dtype; `dtype` applies to raw embeddings only
+        self._matrix = codes.astype(self._dtype) if self.quantizer is None else codes.copy()
+        if self.metric == "l2":
+            self._sq_norms = self._squared_norms(self._matrix)
+        self._size = len(rows)
+
+    def _append_to_matrix(self, row_id: int, embedding: npt.NDArray[Any]) -> None:
+        # Only extend a matrix that is already resident; otherwise the next search loads everything
+        if self._matrix is None:
+            return
+        if self._size == self._matrix.shape[0]:
+            capacity = max(2 * self._matrix.shape[0], 1)
+            grown = np.empty((capacity, self._matrix.shape[1]), dtype=self._matrix.dtype)
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+            self._ids = np.resize(self._ids, capacity)
+            if self.metric == "l2":
+                self._sq_norms = np.resize(self._sq_norms, capacity)
+        self._matrix[self._size] = embedding
+        self._ids[self._size] = row_id
+        if self.metric == "l2":
+            self._sq_norms[self._size] = self._squared_norms(self._matrix[self._size : self._size + 1])[0]
+        self._size += 1
+
+    def _embedding_matrix(self) -> Tuple[npt.NDArray[Any], npt.NDArray[np.int64]]:
+        if self._matrix is None:
+            self._load_matrix()
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=self._dtype), self._ids[:0]
+        return self._matrix[: self._size], self._ids[: self._size]
+
+    def build_ann_index(
+        self, n_lists: int | None = None, nprobe: int = 8, n_iter: int = 10, seed: int | None = 0
+    ) -> IVFFlatIndex:
+        """Train an IVF-flat index over the stored embeddings and save it next to the db.
+
+        Args:
+            n_lists: Number of k-means lists, defaults to ``4 * sqrt(n_vectors)``
+            nprobe: Lists scanned per query; higher is slower with better recall
+            n_iter: k-means iterations
+            seed: Seed for the k-means initialisation
+        """
+        embedding_matrix, ids = self._embedding_matrix()
+        # Quantized stores decode the whole matrix once to train and fill the lists
+        vectors = self._as_vectors(embedding_matrix)
+        self.ann_index = IVFFlatIndex.train(
+            vectors, ids, n_lists, nprobe, n_iter, seed=seed, l2=self.metric == "l2"
+        )
+        self.save_ann_index()
+        return self.ann_index
+
+    def save_ann_index(self) -> None:
+        if self.ann_index is not None:
+            self.ann_index.save(self._ann_path)
+            self._ann_dirty = False
+            self._cursor.execute("DELETE FROM ann_pending")
+            self.conn.commit()
+
+    def _reconcile_ann_index(self) -> None:
+        """Bring a loaded ANN index up to date with writes made while it was not loaded.
+
+        Sessions opened without ``ann`` (or that crashed before saving) leave the index
+        file stale: rows inserted since are added, deleted ones are dropped and rows
+        re-embedded in place (``ann_pending``) are reassigned to their nearest list.
+        """
+        if self.ann_index is None:
+            return
+        indexed = np.concatenate([np.empty(0, dtype=np.int64), *self.ann_index.lists])
+        self._cursor.execute("SELECT id FROM vectors ORDER BY id")
+        stored = np.array([row[0] for row in self._cursor.fetchall()], dtype=np.int64)
+        self._cursor.execute("SELECT id FROM ann_pending")
+        pending = [row[0] for row in self._cursor.fetchall()]
+        missing = stored[~np.isin(stored, indexed)].tolist()
+        removed = indexed[~np.isin(indexed, stored)].tolist()
+        self._sync_ann_index(sorted(set(missing + pending)), removed)
+
+    def _mark_ann_pending(self, row_ids: List[int]) -> None:
+        # Only a saved index that this session does not maintain needs to be told about updates
+        if self.ann_index is None and row_ids and os.path.exists(self._ann_path):
+            self._cursor.executemany(
+                "INSERT OR IGNORE INTO ann_pending (id) VALUES (?)", [(row_id,) for row_id in row_ids]
+            )
+
+    def drop_ann_index(self) -> None:
+        self.ann_index = None
+        self._ann_dirty = False
+        if os.path.exists(self._ann_path):
+            os.remove(self._ann_path)
+
+    def _filter_rows(self, where: Dict[str, Any]) -> npt.NDArray[np.intp]:
+        """Positions in the resident matrix of the rows matching ``where``, selected in SQL."""
+        clause, params = _where_clause(where)
+        self._cursor.execute(f"SELECT id FROM vectors WHERE {clause} ORDER BY id", params)
+        matched = np.array([row[0] for row in self._cursor.fetchall()], dtype=np.int64)
+        _, ids = self._embedding_matrix()
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.intp)
+        rows = np.minimum(np.searchsorted(ids, matched), len(ids) - 1)
+        return rows[ids[rows] == matched]
+
+    def _rank(
+        self,
+        query_embedding: npt.NDArray[Any],
+        k: int,
+        nprobe: int | None = None,
+        rescore: int | None = None,
+        rows: npt.NDArray[np.intp] | None = None,
+        exact: bool = False,
+    ) -> Tuple[npt.NDArray[np.intp], npt.NDArray[Any]]:
+        """Row positions in the resident matrix of the top k matches, and their scores.
+
+        ``rows`` restricts the search to a subset (e.g. a metadata filter), which is then
+        scored exactly instead of through the ANN index; ``exact`` skips the index too.
+        """
+        embedding_matrix, ids = self._embedding_matrix()
+        query_embedding = self._prepare(query_embedding)
+        if rows is None and self.ann_index is not None and not exact:
+            rows = self.ann_index.candidate_rows(query_embedding, ids, nprobe)
+        candidates = embedding_matrix if rows is None else embedding_matrix[rows]
+
+        if self.quantizer is None:
+            scores = inner_product(candidates, query_embedding.astype(self._dtype, copy=False))
+        else:
+            scores = self.quantizer.scores(candidates, query_embedding)
+        if self.metric == "l2":
+            sq_norms = self._sq_norms[: self._size]
+            scores = 2 * scores - (sq_norms if rows is None else sq_norms[rows])
+
+        if self.quantizer is None:
+            best = top_k(scores, k)
+            best_scores = scores[best]
+        else:
+            rescore = self.rescore if rescore is None else rescore
+            rescore = rescore if self._has_full else 0
+            best = top_k(scores, k * max(rescore, 1))
+            best_scores = scores[best]
+            if rescore and len(best):
+                # Exact scores for the shortlist from the full-precision copies
+                best_ids = ids[best] if rows is None else ids[rows[best]]
+                full = self._fetch_column("embedding_full", [int(i) for i in best_ids])
+                vectors = np.frombuffer(b"".join(full[int(i)] for i in best_ids), dtype=np.float32)
+                vectors = vectors.reshape(len(best_ids), -1)
+                exact = vectors @ query_embedding.astype(np.float32)
+                if self.metric == "l2":
+                    exact = 2 * exact - np.einsum("ij,ij->i", vectors, vectors)
+                order = top_k(exact, k)
+                best, best_scores = best[order], exact[order]
+        best_scores = self._output_scores(best_scores, query_embedding @ query_embedding)
+        return (best if rows is None else rows[best]), best_scores
+
+    def _exact_top_ids(self, query_matrix: npt.NDArray[Any], k: int) -> npt.NDArray[np.int64]:
+        """Ids of the exact top k for every query, over full-precision vectors."""
+        query_matrix = self._prepare(query_matrix)
+        if self.quantizer is None:
+            embedding_matrix, ids = self._embedding_matrix()
+            similarities = query_matrix.astype(self._dtype) @ embedding_matrix.T
+            if self.metric == "l2":
+                similarities = 2 * similarities - self._sq_norms[: self._size]
+            return ids[top_k(similarities, k)]
+        if not self._has_full:
+            raise ValueError("Exact search needs the full-precision vectors, quantize with keep_full=True")
+        query_matrix = query_matrix.astype(np.float32)
+        best_scores = np.empty((len(query_matrix), 0), dtype=np.float32)
+        best_ids = np.empty((len(query_matrix), 0), dtype=np.int64)
+        # Stream the full-precision column so it never has to be resident
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT id, embedding_full FROM vectors ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(8192)
+            if not rows:
+                break
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+            batch_scores = query_matrix @ vectors.T
+            if self.metric == "l2":
+                batch_scores = 2 * batch_scores - np.einsum("ij,ij->i", vectors, vectors)
+            scores = np.hstack([best_scores, batch_scores])
+            all_ids = np.hstack([best_ids, np.broadcast_to(ids, (len(query_matrix), len(ids)))])
+            keep = top_k(scores, k)
+            best_scores = np.take_along_axis(scores, keep, axis=-1)
+            best_ids = np.take_along_axis(all_ids, keep, axis=-1)
+        return best_ids
+
+    def _recall(
+        self,
+        query_matrix: npt.NDArray[Any],
+        k: int,
+        nprobe: int | None = None,
+        rescore: int | None = None,
+        exact: bool = False,
+    ) -> float:
+        exact_ids = self._exact_top_ids(query_matrix, k)
+        if exact_ids.size == 0:
+            return 1.0
+        _, ids = self._embedding_matrix()
+        hits = 0
+        for query_embedding, expected in zip(query_matrix, exact_ids):
+            rows, _ = self._rank(query_embedding, k, nprobe, rescore, exact=exact)
+            hits += len(np.intersect1d(ids[rows], expected))
+        return hits / exact_ids.size
+
+    def recall_at_k(self, queries: List[str], k: int = 10, nprobe: int | None = None) -> float:
+        """Recall@k of the configured search (ANN index, quantized storage) against exact search."""
+        return self._recall(self._embed_queries(queries), k, nprobe)
+
+    def quantize(
+        self,
+        mode: str = "int8",
+        keep_full: bool = True,
+        recall_tolerance: float = 0.02,
+        sample_size: int = 100_000,
+        n_queries: int = 100,
+        batch_size: int = 10_000,
+        seed: int | None = 0,
+        **train_kwargs: Any,
+    ) -> float:
+        """Rewrite the stored embeddings as compact codes.
+
+        ``"float16"`` halves float32 storage, ``"int8"`` (per-dimension scalar
+        quantization) stores one byte per dimension and ``"pq"`` (product quantization,
+        ``m`` bytes per vector) is smaller still. The resident matrix holds the codes.
+        With ``keep_full`` a float32 copy is kept in ``embedding_full`` and the top
+        ``k * rescore`` candidates are rescored against it; without it the file shrinks
+        further but results use the approximate scores only.
+
+        Recall@10 against exact search is measured on ``n_queries`` stored vectors before
+        committing; the rewrite is rolled back if it is below ``1 - recall_tolerance``.
+        The check bypasses any ANN index, so it covers the quantization loss only.
+        float16 and int8 are close to lossless after rescoring; pq without ``keep_full``
+        usually needs a looser tolerance.
+
+        Returns:
+            The measured recall@10
+        """
+        if self.quantizer is not None:
+            raise ValueError(f"Store is already quantized ({self.quantizer.kind})")
+        rng = np.random.default_rng(seed)
+        all_ids = [row[0] for row in self._cursor.execute("SELECT id FROM vectors ORDER BY id").fetchall()]
+        if not all_ids:
+            raise ValueError("Cannot quantize an empty store")
+        sample_ids = np.sort(rng.choice(all_ids, min(sample_size, len(all_ids)), replace=False))
+        blobs = self._fetch_column("embedding", [int(i) for i in sample_ids])
+        sample = self._codes_from_blobs([blobs[int(i)] for i in sample_ids])
+        quantizer = train_quantizer(mode, sample, **train_kwargs)
+        queries = sample[rng.choice(len(sample), min(n_queries, len(sample)), replace=False)]
+
+        try:
+            last_id = 0
+            while True:
+                self._cursor.execute(
+                    "SELECT id, embedding FROM vectors WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                )
+                rows = self._cursor.fetchall()
+                if not rows:
+                    break
+                vectors = self._codes_from_blobs([row[1] for row in rows])
+                codes = quantizer.encode(vectors)
+                self._cursor.executemany(
+                    "UPDATE vectors SET embedding = ?, embedding_full = ? WHERE id = ?",
+                    [
+                        (code.tobytes(), full.tobytes(), row[0])
+                        for code, full, row in zip(codes, vectors.astype(np.float32), rows)
+                    ],
+                )
+                last_id = rows[-1][0]
+            self.quantizer, self._has_full = quantizer, True
+            self.invalidate_cache()
+            # Without the ANN index, so only the quantization loss is measured
+            recall = self._recall(queries, 10, rescore=None if keep_full else 0, exact=True)
+            if recall < 1 - recall_tolerance:
+                raise ValueError(
+                    f"{mode} recall@10 of {recall:.3f} is outside the tolerance of {recall_tolerance}"
+                )
+            if not keep_full:
+                self._cursor.execute("UPDATE vectors SET embedding_full = NULL")
+                self._has_full = False
+            self._cursor.executemany(
+                "INSERT OR REPLACE INTO store_info (key, value) VALUES (?, ?)",
+                [("quantizer", quantizer.to_bytes()), ("full_precision", "1" if keep_full else "0")],
+            )
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            self.quantizer, self._has_full = None, False
+            self.invalidate_cache()
+            raise
+        # Reclaim the space freed by the smaller rows; under WAL the file only shrinks at a checkpoint
+        self._cursor.execute("VACUUM")
+        self._cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return recall
+
+    def _fetch_column(self, column: str, ids: List[int]) -> Dict[int, Any]:
+        values: Dict[int, Any] = {}
+        unique_ids = list(dict.fromkeys(ids))
+        # Stay under SQLite's default limit of 999 bound variables per statement
+        for start in range(0, len(unique_ids), 900):
+            batch = unique_ids[start : start + 900]
+            placeholders = ",".join("?" * len(batch))
+            self._cursor.execute(f"SELECT id, {column} FROM vectors WHERE id IN ({placeholders})", batch)
+            values.update(self._cursor.fetchall())
+        return values
+
+    def _fetch_metadata(self, ids: List[int]) -> Dict[int, str]:
+        return self._fetch_column("metadata", ids)
+
+    def _embed_queries(self, queries: List[str]) -> npt.NDArray[np.float64]:
+        if self.embed_batch_fn is not None:
+            return np.asarray(self.embed_batch_fn(queries), dtype=np.float64)
+        query_embeddings = [self.embed_fn(query) for query in queries]
+        if any(embedding is None for embedding in query_embeddings):
+            raise ValueError("Query embedding is None")
+        return np.vstack(query_embeddings)  # type: ignore
+
+    def search_vectors(
+        self, user_query: str, k: int = 5, nprobe: int | None = None, where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[int, float, str]] | QueryResult:
+        """Search for k most similar vectors under the store's metric (higher scores are closer;
+        l2 scores are negated distances).
+        Scans only ``nprobe`` IVF lists when an ANN index is loaded. ``where`` (see
+        ``_where_clause``) restricts the search to matching chunks.
         Returns list of tuples containing (id, similarity_score, metadata)
         """
         query_embedding = self.embed_fn(user_query)
         if query_embedding is None:
             raise ValueError("Query embedding is None")
-        # Get all vectors from db
-        self._cursor.execute("SELECT id, embedding, metadata FROM vectors")
-        rows = self._cursor.fetchall()
+        # Resident matrix, loaded from the db on first use and extended by add_vector
+        embedding_matrix, ids = self._embedding_matrix()
 
-        if not rows:
+        if len(ids) == 0:
             return []
 
-        # Convert BLOB embeddings back to numpy arrays
-        ids = []
-        embeddings = []
-        metadata = []
-        for row in rows:
-            ids.append(row[0])
-            embeddings.append(np.frombuffer(row[1], dtype=np.float64))
-            metadata.append(row[2])
+        # Calculate similarities and get top k rows
+        rows = self._filter_rows(where) if where else None
+        top_k_indices, scores = self._rank(query_embedding, k, nprobe, rows=rows)
 
-        # Stack embeddings into a matrix
-        embedding_matrix = np.vstack(embeddings)
+        # Return results, fetching metadata only for the top k rows
+        top_ids = [int(ids[i]) for i in top_k_indices]
+        metadata = self._fetch_metadata(top_ids)
+        vectors = self._as_vectors(embedding_matrix[top_k_indices])
+        results = [
+            (top_ids[rank], vectors[rank], float(scores[rank]), metadata[top_ids[rank]])
+            for rank in range(len(top_ids))
+        ]
 
-        # Calculate similarities
-        # similarities = cosine_similarity(embedding_matrix, query_embedding)
-        # similarities = euclidean_distance(embedding_matrix, query_embedding)
-        similarities = inner_product(embedding_matrix, query_embedding)
+        return results
 
-        # Get top k indices
-        top_k_indices = np.argsort(similarities)[-k:][::-1]
-        # top_k_indices = np.argsort(similarities)[:k]
+    def search_hybrid(
+        self,
+        user_query: str,
+        k: int = 5,
+        candidates: int = 50,
+        rrf_k: int = 60,
+        nprobe: int | None = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Any, ...]]:
+        """Fuse BM25 and vector rankings with reciprocal-rank fusion.
 
-        # Return results
-        results = [(ids[i], embeddings[i], float(similarities[i]), metadata[i]) for i in top_k_indices]
+        The top ``candidates`` of each ranking are merged by ``sum(1 / (rrf_k + rank))``,
+        so chunks with exact query terms (e.g. product names) surface even when their
+        embedding is not among the nearest. Both rankings come from this store, so the
+        only network call is the query embedding.
+        Returns ``search_vectors``-style tuples with the fused score.
+        """
+        query_embedding = self.embed_fn(user_query)
+        if query_embedding is None:
+            raise ValueError("Query embedding is None")
+        embedding_matrix, ids = self._embedding_matrix()
+        if len(ids) == 0:
+            return []
+
+        rows = self._filter_rows(where) if where else None
+        dense_rows, _ = self._rank(query_embedding, candidates, nprobe, rows=rows)
+        lexical = self.lexical_index.search(user_query, candidates, None if rows is None else ids[rows])
+        fused = reciprocal_rank_fusion(
+            [[int(ids[i]) for i in dense_rows], [doc_id for doc_id, _ in lexical]], rrf_k
+        )[:k]
+
+        top_ids = [doc_id for doc_id, _ in fused]
+        metadata = self._fetch_metadata(top_ids)
+        vectors = self._as_vectors(embedding_matrix[np.searchsorted(ids, top_ids)])
+        return [
+            (doc_id, vectors[rank], score, metadata[doc_id]) for rank, (doc_id, score) in enumerate(fused)
+        ]
+
+    def search_vectors_batch(
+        self, queries: List[str], k: int = 5, where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Any, ...]]]:
+        """Search several queries at once.
+
+        All queries are embedded together (with ``embed_batch_fn`` when available),
+        scored against the resident matrix with one matrix product and ranked with
+        ``argpartition``. With a ``where`` filter, an ANN index or quantized storage each
+        query is ranked separately instead. Returns one ``search_vectors``-style result list per query.
+        """
+        if not queries:
+            return []
+        embedding_matrix, ids = self._embedding_matrix()
+        if len(ids) == 0:
+            return [[] for _ in queries]
+
+        query_matrix = self._prepare(self._embed_queries(queries))
+        if not where and self.ann_index is None and self.quantizer is None:
+            similarities = query_matrix.astype(self._dtype, copy=False) @ embedding_matrix.T
+            if self.metric == "l2":
+                similarities = 2 * similarities - self._sq_norms[: self._size]
+            top_k_indices = top_k(similarities, k)
+            scores = self._output_scores(
+                np.take_along_axis(similarities, top_k_indices, axis=-1),
+                np.einsum("ij,ij->i", query_matrix, query_matrix)[:, None],
+            )
+            ranked = list(zip(top_k_indices, scores))
+        else:
+            filter_rows = self._filter_rows(where) if where else None
+            ranked = [self._rank(query_embedding, k, rows=filter_rows) for query_embedding in query_matrix]
 
+        metadata = self._fetch_metadata([int(ids[i]) for rows, _ in ranked for i in rows])
+        results = []
+        for rows, scores in ranked:
+            vectors = self._as_vectors(embedding_matrix[rows])
+            results.append(
+                [
+                    (int(ids[i]), vectors[rank], float(scores[rank]), metadata[int(ids[i])])
+                    for rank, i in enumerate(rows)
+                ]
+            )
         return results
 
     def chunk_documents(self, folder_path: str, output_dir: str, file_type: Optional[str] = None) -> None:
@@ -166,15 +835,385 @@ class SqliteVectorDB(VectorDB):
             raise ValueError(f"Unsupported file type: {file_type}")
 
     def load_documents(self, json_path: str) -> None:
-        with open(json_path, "r", encoding="utf-8") as f:
-            for line in f:
-                chunk = json.loads(line)
-                chunk_text = chunk["text"]
-                # Metadata can be the entire chunk as a JSON string (for context retrieval)
-                metadata_str = json.dumps(chunk, ensure_ascii=False)
-                self.add_vector(self.embed_fn(chunk_text), metadata_str)
+        # Additive: nothing stored is deleted (deleting is opt-in via sync_documents), chunks
+        # with a known chunk_id are updated in place and chunks without one are inserted
+        self.bulk_load_documents(json_path, progress=False)
+
+    def _embed_texts(self, texts: List[str]) -> List[npt.NDArray[np.float64] | None]:
+        return _embed_texts(self.embed_fn, self.embed_batch_fn, texts)
+
+    def bulk_load_documents(
+        self,
+        json_path: str,
+        batch_size: int = 256,
+        checkpoint_rows: int = 10_000,
+        progress: bool = True,
+    ) -> int:
+        """Stream a chunks JSONL file into the vectors table.
+
+        Chunks are embedded ``batch_size`` at a time (one request per batch when
+        ``embed_batch_fn`` is set) and written with ``executemany`` inside a single
+        transaction that is committed every ``checkpoint_rows`` rows. Like
+        ``sync_documents``, chunks are keyed on ``chunk_id``: unchanged chunks are
+        skipped without embedding and changed ones are updated in place, so re-running
+        a load does not duplicate rows. Stored chunks missing from the file are kept.
+
+        Returns:
+            Number of rows inserted
+        """
+        self._backfill_content_hashes()
+        existing: Dict[str, Tuple[int, str | None]] = {
+            chunk_id: (row_id, content_hash)
+            for row_id, chunk_id, content_hash in self._cursor.execute(
+                "SELECT id, chunk_id, content_hash FROM vectors WHERE chunk_id IS NOT NULL ORDER BY id"
+            ).fetchall()
+        }
+        inserted = 0
+        uncommitted = 0
+        updated_ids: List[int] = []
+        start = time.perf_counter()
+        last_id = self._cursor.execute("SELECT COALESCE(MAX(id), 0) FROM vectors").fetchone()[0]
+        batch_last_id = last_id
+        try:
+            for chunks in _iter_chunk_batches(json_path, batch_size):
+                # Later lines win when a chunk_id repeats; chunks without one are always inserted
+                pending: Dict[Any, Dict[str, Any]] = {}
+                for position, chunk in enumerate(chunks):
+                    chunk_id = chunk.get("chunk_id")
+                    current = existing.get(chunk_id) if chunk_id is not None else None
+                    if current is not None and current[1] == _content_hash(chunk):
+                        pending.pop(chunk_id, None)
+                    else:
+                        pending[chunk_id if chunk_id is not None else (position,)] = chunk
+                chunk_embeddings = []
+                if pending:
+                    chunk_embeddings = self._embed_texts([chunk["text"] for chunk in pending.values()])
+                embedded = [
+                    (chunk, embedding)
+                    for chunk, embedding in zip(pending.values(), chunk_embeddings)
+                    if embedding is not None
+                ]
+                rows = []
+                updates = []
+                if embedded:
+                    codes, full = self._encode_rows(
+                        self._prepare(np.vstack([embedding for _, embedding in embedded]))
+                    )
+                    for (chunk, _), code, full_blob in zip(embedded, codes, full):
+                        row = _chunk_row(chunk, code, full_blob)
+                        current = existing.get(chunk.get("chunk_id"))
+                        if current is None:
+                            rows.append(row)
+                        else:
+                            updates.append((*row, current[0]))
+                            existing[chunk["chunk_id"]] = (current[0], row[-1])
+                self._cursor.executemany(_INSERT_VECTOR, rows)
+                self._cursor.executemany(_UPDATE_VECTOR, updates)
+                if updates:
+                    updated_ids.extend(update[-1] for update in updates)
+                    self._mark_ann_pending([update[-1] for update in updates])
+                    # Same row ids, new text: re-index them here, new rows are picked up below
+                    self.lexical_index.add([(update[-1], metadata_text(update[1])) for update in updates])
+                if rows:
+                    # Register the new rows so a chunk_id repeated in a later batch updates them
+                    for row_id, chunk_id, content_hash in self._cursor.execute(
+                        "SELECT id, chunk_id, content_hash FROM vectors "
+                        "WHERE id > ? AND chunk_id IS NOT NULL",
+                        (batch_last_id,),
+                    ).fetchall():
+                        existing[chunk_id] = (row_id, content_hash)
+                    batch_last_id = self._cursor.execute("SELECT MAX(id) FROM vectors").fetchone()[0]
+                inserted += len(rows)
+                uncommitted += len(rows) + len(updates)
+                if uncommitted >= checkpoint_rows:
+                    self.conn.commit()
+                    uncommitted = 0
+                if progress:
+                    elapsed = time.perf_counter() - start
+                    print(
+                        f"Inserted {inserted} rows, updated {len(updated_ids)} "
+                        f"({(inserted + len(updated_ids)) / elapsed:.1f} rows/sec)"
+                    )
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            # Row ids were assigned by SQLite; reload the resident matrix on the next search
+            self.invalidate_cache()
+            self._sync_lexical_index()
+            if self.ann_index is not None:
+                # Rows of committed checkpoints are in the table even if a later batch failed;
+                # updated rows keep their ids but may belong in different lists now
+                self._cursor.execute("SELECT id FROM vectors WHERE id > ? ORDER BY id", (last_id,))
+                new_ids = [row[0] for row in self._cursor.fetchall()]
+                self._sync_ann_index(new_ids + updated_ids, [])
+        return inserted
+
+    def _backfill_content_hashes(self) -> None:
+        self._cursor.execute(
+            "SELECT id, metadata FROM vectors WHERE content_hash IS NULL AND chunk_id IS NOT NULL"
+        )
+        rows = self._cursor.fetchall()
+        self._cursor.executemany(
+            "UPDATE vectors SET content_hash = ? WHERE id = ?",
+            [(_content_hash(json.loads(metadata)), row_id) for row_id, metadata in rows],
+        )
+        self.conn.commit()
+
+    def _sync_lexical_index(self, batch_size: int = 1000) -> None:
+        """Index rows missing from the BM25 index (legacy stores, bulk loads) and drop deleted ones."""
+        (n_vectors,) = self.conn.execute("SELECT COUNT(*) FROM vectors").fetchone()
+        if n_vectors == len(self.lexical_index):
+            return
+        orphans = self.conn.execute(
+            "SELECT doc_id FROM bm25_docs WHERE doc_id NOT IN (SELECT id FROM vectors)"
+        ).fetchall()
+        self.lexical_index.remove([row[0] for row in orphans])
+        reader = self.conn.execute(
+            "SELECT id, metadata FROM vectors WHERE id NOT IN (SELECT doc_id FROM bm25_docs) ORDER BY id"
+        )
+        while rows := reader.fetchmany(batch_size):
+            self.lexical_index.add([(row_id, metadata_text(metadata)) for row_id, metadata in rows])
+        self.conn.commit()
+
+    def _sync_ann_index(self, added_ids: List[int], removed_ids: List[int]) -> None:
+        if self.ann_index is None or not (added_ids or removed_ids):
+            return
+        self.ann_index.remove(removed_ids + added_ids)
+        blobs = self._fetch_column("embedding", added_ids)
+        present = [row_id for row_id in added_ids if row_id in blobs]
+        if present:
+            vectors = self._as_vectors(self._codes_from_blobs([blobs[row_id] for row_id in present]))
+            self.ann_index.add(present, vectors)
+        self.save_ann_index()
+
+    def sync_documents(
+        self, json_path: str, batch_size: int = 256, delete_missing: bool = True, progress: bool = True
+    ) -> Dict[str, int]:
+        """Upsert a chunks JSONL file keyed on ``chunk_id``.
+
+        Chunks whose content hash is already stored are skipped without calling
+        ``embed_fn``; changed chunks are re-embedded and updated in place (keeping their
+        row id); new chunks are inserted. With ``delete_missing`` the file is treated as
+        a full snapshot and stored chunks absent from it are deleted. Duplicate rows left
+        by earlier append-only loads are collapsed to the newest one. Each batch is
+        committed on its own, so an interrupted run is completed by the next one.
+
+        Returns:
+            Counts of ``inserted``, ``updated``, ``unchanged``, ``deleted`` and ``skipped``
+            (no ``chunk_id``) chunks
+        """
+        self._backfill_content_hashes()
+        existing: Dict[str, Tuple[int, str | None]] = {}
+        removed: List[int] = []
+        self._cursor.execute(
+            "SELECT id, chunk_id, content_hash FROM vectors WHERE chunk_id IS NOT NULL ORDER BY id"
+        )
+        for row_id, chunk_id, content_hash in self._cursor.fetchall():
+            if chunk_id in existing:
+                removed.append(existing[chunk_id][0])
+            existing[chunk_id] = (row_id, content_hash)
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+        seen = set()
+        touched: List[int] = []
+        start = time.perf_counter()
+        try:
+            for chunks in _iter_chunk_batches(json_path, batch_size):
+                # Later lines win when a chunk_id repeats
+                pending: Dict[str, Dict[str, Any]] = {}
+                indexed: List[Tuple[int, str]] = []
+                for chunk in chunks:
+                    chunk_id = chunk.get("chunk_id")
+                    if chunk_id is None:
+                        counts["skipped"] += 1
+                        continue
+                    seen.add(chunk_id)
+                    current = existing.get(chunk_id)
+                    if current is not None and current[1] == _content_hash(chunk):
+                        pending.pop(chunk_id, None)
+                        counts["unchanged"] += 1
+                    else:
+                        pending[chunk_id] = chunk
+                if pending:
+                    chunk_embeddings = self._embed_texts([chunk["text"] for chunk in pending.values()])
+                    embedded = [
+                        (chunk, embedding)
+                        for chunk, embedding in zip(pending.values(), chunk_embeddings)
+                        if embedding is not None
+                    ]
+                    if embedded:
+                        codes, full = self._encode_rows(
+                            self._prepare(np.vstack([embedding for _, embedding in embedded]))
+                        )
+                        for (chunk, _), code, full_blob in zip(embedded, codes, full):
+                            row = _chunk_row(chunk, code, full_blob)
+                            current = existing.get(chunk["chunk_id"])
+                            if current is None:
+                                self._cursor.execute(_INSERT_VECTOR, row)
+                                row_id = int(self._cursor.lastrowid or 0)
+                                counts["inserted"] += 1
+                            else:
+                                row_id = current[0]
+                                self._cursor.execute(_UPDATE_VECTOR, (*row, row_id))
+                                self._mark_ann_pending([row_id])
+                                counts["updated"] += 1
+                            existing[chunk["chunk_id"]] = (row_id, row[-1])
+                            touched.append(row_id)
+                            indexed.append((row_id, chunk["text"]))
+                self.lexical_index.add(indexed)
+                self.conn.commit()
+                if progress:
+                    elapsed = time.perf_counter() - start
+                    print(f"Synced {sum(counts.values())} chunks ({counts}, {elapsed:.1f}s)")
+
+            if delete_missing:
+                removed.extend(row_id for chunk_id, (row_id, _) in existing.items() if chunk_id not in seen)
+            for begin in range(0, len(removed), 900):
+                batch = removed[begin : begin + 900]
+                self._cursor.execute(f"DELETE FROM vectors WHERE id IN ({','.join('?' * len(batch))})", batch)
+            self.lexical_index.remove(removed)
+            counts["deleted"] = len(removed)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self.invalidate_cache()
+            # Rows of committed batches are in the table even if a later batch failed
+            self._sync_ann_index(touched, removed if counts["deleted"] else [])
+        return counts
+
+    def close(self) -> None:
+        if self._ann_dirty:
+            self.save_ann_index()
+        self.conn.close()
+
+
+# Implement VectorDB over a memory-mapped embeddings file
+class MemmapVectorDB(VectorDB):
+    """Vector store that keeps embeddings in a fixed-stride raw file.
+
+    ``embeddings.bin`` holds one ``dim * itemsize`` row per vector and is searched
+    through ``np.memmap``, so queries run directly over the OS page cache and
+    processes on the same host share one copy. Metadata lives in ``metadata.db``
+    keyed by row number.
+    """
+
+    def __init__(
+        self,
+        db_dir: str,
+        embed_fn: Callable[[str], npt.NDArray[np.float64] | None],
+        dtype: npt.DTypeLike = np.float32,
+        embed_batch_fn: Callable[[List[str]], npt.NDArray[np.float64]] | None = None,
+    ):
+        os.makedirs(db_dir, exist_ok=True)
+        self.embed_fn = embed_fn
+        self.embed_batch_fn = embed_batch_fn
+        self._vectors_path = os.path.join(db_dir, "embeddings.bin")
+        self.conn = sqlite3.connect(os.path.join(db_dir, "metadata.db"))
+        self._cursor = self.conn.cursor()
+        self._cursor.execute("PRAGMA journal_mode=WAL")
+        self._cursor.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                row INTEGER PRIMARY KEY,
+                metadata TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )"""
+        )
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS store_info (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        info = dict(self._cursor.execute("SELECT key, value FROM store_info").fetchall())
+        if "dtype" in info and np.dtype(info["dtype"]) != np.dtype(dtype):
+            raise ValueError(f"Store was created with dtype {info['dtype']}, got {np.dtype(dtype).str}")
+        self._dtype = np.dtype(dtype)
+        self._dim: int | None = int(info["dim"]) if "dim" in info else None
+        self._mapped: np.memmap | None = None
+
+    def _row_count(self) -> int:
+        if self._dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        file_rows = os.path.getsize(self._vectors_path) // (self._dim * self._dtype.itemsize)
+        (documents,) = self._cursor.execute("SELECT COUNT(*) FROM documents").fetchone()
+        # A write interrupted between the file append and the commit leaves extra file rows; ignore them
+        return min(file_rows, documents)
+
+    def _vectors(self) -> npt.NDArray[Any]:
+        n_rows = self._row_count()
+        if n_rows == 0 or self._dim is None:
+            return np.empty((0, self._dim or 0), dtype=self._dtype)
+        if self._mapped is None or self._mapped.shape[0] != n_rows:
+            self._mapped = np.memmap(
+                self._vectors_path, dtype=self._dtype, mode="r", shape=(n_rows, self._dim)
+            )
+        return self._mapped
+
+    def _append(self, embeddings: npt.NDArray[Any], metadata: List[str]) -> None:
+        embeddings = np.ascontiguousarray(np.atleast_2d(embeddings), dtype=self._dtype)
+        if self._dim is None:
+            self._dim = embeddings.shape[1]
+            self._cursor.executemany(
+                "INSERT OR REPLACE INTO store_info (key, value) VALUES (?, ?)",
+                [("dim", str(self._dim)), ("dtype", self._dtype.str)],
+            )
+        elif embeddings.shape[1] != self._dim:
+            raise ValueError(f"Expected embeddings of dimension {self._dim}, got {embeddings.shape[1]}")
+        first_row = self._row_count()
+        self._cursor.executemany(
+            "INSERT INTO documents (row, metadata) VALUES (?, ?)",
+            [(first_row + i, text) for i, text in enumerate(metadata)],
+        )
+        with open(self._vectors_path, "r+b" if os.path.exists(self._vectors_path) else "wb") as f:
+            f.seek(first_row * self._dim * self._dtype.itemsize)
+            f.write(embeddings.tobytes())
+            f.truncate()
+        self.conn.commit()
+        self._mapped = None
+
+    def add_vector(
+        self, embedding: npt.NDArray[np.float64] | None = None, metadata: Optional[str] = None
+    ) -> None:
+        if metadata is None:
+            raise ValueError("Metadata is required")
+        if embedding is None:
+            embedding = self.embed_fn(metadata)
+        if embedding is None:
+            raise ValueError("Embedding is None")
+        self._append(embedding, [metadata])
+
+    def search_vectors(self, user_query: str, k: int = 5) -> List[Tuple[int, float, str]] | QueryResult:
+        """Search for k most similar vectors by inner product over the mapped file.
+        Returns list of tuples containing (row, embedding, similarity_score, metadata)
+        """
+        query_embedding = self.embed_fn(user_query)
+        if query_embedding is None:
+            raise ValueError("Query embedding is None")
+        vectors = self._vectors()
+        if vectors.shape[0] == 0:
+            return []
+        similarities = inner_product(vectors, query_embedding.astype(self._dtype, copy=False))
+        top_rows = [int(row) for row in top_k(similarities, k)]
+        placeholders = ",".join("?" * len(top_rows))
+        self._cursor.execute(f"SELECT row, metadata FROM documents WHERE row IN ({placeholders})", top_rows)
+        metadata = dict(self._cursor.fetchall())
+        return [(row, np.array(vectors[row]), float(similarities[row]), metadata[row]) for row in top_rows]
+
+    def load_documents(self, json_path: str, batch_size: int = 256) -> None:
+        for chunks in _iter_chunk_batches(json_path, batch_size):
+            texts = [chunk["text"] for chunk in chunks]
+            chunk_embeddings = _embed_texts(self.embed_fn, self.embed_batch_fn, texts)
+            kept = [(chunk, emb) for chunk, emb in zip(chunks, chunk_embeddings) if emb is not None]
+            if kept:
+                self._append(
+                    np.vstack([embedding for _, embedding in kept]),
+                    [json.dumps(chunk, ensure_ascii=False) for chunk, _ in kept],
+                )
 
     def close(self) -> None:
+        self._mapped = None
         self.conn.close()
 
 
@@ -183,6 +1222,7 @@ if __name__ == "__main__":
     vector_db_sqlite = SqliteVectorDB(
         db_path=r"D:\projects\machine_learning_workspace\ml-boilerplate\dataset/bio_vector_db.db",
         embed_fn=embed_text,
+        embed_batch_fn=embed_texts,
     )
     print("SQLite Vector DB initialized...")
     # chunk markdown files
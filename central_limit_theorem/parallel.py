@@ -0,0 +1,177 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ml_boilerplate_module.resampling import (
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_N_RESAMPLES,
+    RngLike,
+    resample_means,
+)
+
+
+def split_resamples(n_resamples: int, n_workers: int) -> List[int]:
+    """Split ``n_resamples`` into ``n_workers`` near-equal, deterministic shares."""
+    base, extra = divmod(n_resamples, n_workers)
+    return [base + (1 if i < extra else 0) for i in range(n_workers)]
+
+
+def _seed_sequence(seed: RngLike) -> np.random.SeedSequence:
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, np.random.Generator):
+        return np.random.SeedSequence(int(seed.integers(2**63)))
+    return np.random.SeedSequence(seed)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment owned by the parent without registering it with the resource tracker.
+
+    Before Python 3.13 every attach registers the segment, which is reported as leaked at
+    shutdown. Unregistering after the attach would also drop the parent's registration,
+    since the tracker is shared and keeps one entry per name.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _worker_sample_means(
+    shm_name: str,
+    shape: Tuple[int, ...],
+    dtype: str,
+    sample_size: int,
+    n_resamples: int,
+    seed_seq: np.random.SeedSequence,
+    memory_budget: int,
+) -> npt.NDArray[np.floating]:
+    shm = _attach_shared_memory(shm_name)
+    try:
+        population = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        return resample_means(
+            population, sample_size, n_resamples, rng=seed_seq, dtype=dtype, memory_budget=memory_budget
+        )
+    finally:
+        shm.close()
+
+
+def parallel_sample_means(
+    data: npt.ArrayLike,
+    sample_size: int,
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    seed: RngLike = None,
+    n_workers: int | None = None,
+    dtype: npt.DTypeLike = np.float64,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+) -> npt.NDArray[np.floating]:
+    """Bootstrap sample means on a process pool.
+
+    The population is copied once into shared memory and attached by every worker.
+    Worker ``i`` draws its share of the resamples from the ``i``-th child of
+    ``SeedSequence(seed).spawn(n_workers)`` and results are concatenated in worker
+    order, so the output is bit-reproducible for a given seed and worker count.
+
+    Args:
+        data: Population to resample (with replacement)
+        sample_size: Number of draws per resample
+        n_resamples: Total number of resamples across all workers
+        seed: Seed or ``SeedSequence`` for the spawned worker streams
+        n_workers: Number of processes (default: ``os.cpu_count()``)
+        dtype: Floating dtype of the population copy and the returned means
+        memory_budget: Per-worker chunk budget in bytes, see ``resampling.chunk_rows``
+
+    Returns:
+        Array of ``n_resamples`` sample means
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers < 1:
+        raise ValueError(f"n_workers must be positive, got {n_workers}")
+    population = np.asarray(data, dtype=dtype).ravel()
+    shares = split_resamples(n_resamples, n_workers)
+    streams = _seed_sequence(seed).spawn(n_workers)
+
+    if n_workers == 1:
+        return resample_means(
+            population, sample_size, shares[0], rng=streams[0], dtype=dtype, memory_budget=memory_budget
+        )
+
+    shm = shared_memory.SharedMemory(create=True, size=max(population.nbytes, 1))
+    try:
+        shared = np.ndarray(population.shape, dtype=population.dtype, buffer=shm.buf)
+        shared[:] = population
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(
+                    _worker_sample_means,
+                    shm.name,
+                    population.shape,
+                    population.dtype.str,
+                    sample_size,
+                    share,
+                    stream,
+                    memory_budget,
+                )
+                for share, stream in zip(shares, streams)
+            ]
+            return np.concatenate([future.result() for future in futures])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def benchmark_scaling(
+    population_size: int = 10_000_000,
+    sample_size: int = 30,
+    n_resamples: int = 1_000_000,
+    max_workers: int | None = None,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Time ``parallel_sample_means`` for 1..max_workers processes and report throughput."""
+    max_workers = max_workers or os.cpu_count() or 1
+    population = np.random.default_rng(seed).normal(0.0, 1.0, population_size)
+    results: List[Dict[str, Any]] = []
+    for n_workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        parallel_sample_means(population, sample_size, n_resamples, seed=seed, n_workers=n_workers)
+        seconds = time.perf_counter() - start
+        results.append(
+            {
+                "n_workers": n_workers,
+                "seconds": seconds,
+                "resamples_per_sec": n_resamples / seconds,
+                "speedup": results[0]["seconds"] / seconds if results else 1.0,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multi-core sample mean resampling")
+    parser.add_argument("--population-size", type=int, default=10_000_000)
+    parser.add_argument("--sample-size", type=int, default=30)
+    parser.add_argument("--n-resamples", type=int, default=1_000_000)
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'seconds':>10} {'resamples/s':>14} {'speedup':>8}")
+    for row in benchmark_scaling(
+        args.population_size, args.sample_size, args.n_resamples, args.max_workers, args.seed
+    ):
+        print(
+            f"{row['n_workers']:>8} {row['seconds']:>10.3f} "
+            f"{row['resamples_per_sec']:>14,.0f} {row['speedup']:>8.2f}"
+        )
@@ -0,0 +1,121 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ml_boilerplate_module.distributions import sample_population
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_SPILL_THRESHOLD = 64 * 1024 * 1024
+
+CacheKey = Tuple[str, Tuple[Tuple[str, Any], ...], int, Hashable]
+
+
+class PopulationCache:
+    """Bounded LRU cache of generated populations.
+
+    Entries are keyed by ``(distribution, params, size, seed)`` and returned read-only.
+    In-memory entries are evicted least-recently-used first once they exceed
+    ``max_bytes``. If ``spill_dir`` is set, populations of at least
+    ``spill_threshold`` bytes are written to ``.npy`` files and served through
+    ``np.load(mmap_mode="r")``; those count against ``max_spill_bytes`` instead.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        spill_dir: str | None = None,
+        spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+        max_spill_bytes: int | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_threshold = spill_threshold
+        self.max_spill_bytes = max_spill_bytes
+        self._entries: "OrderedDict[CacheKey, npt.NDArray[Any]]" = OrderedDict()
+        self._spill_paths: Dict[CacheKey, str] = {}
+        self.memory_bytes = 0
+        self.spill_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(distribution: str, params: Dict[str, Any], size: int, seed: Hashable) -> CacheKey:
+        return (distribution, tuple(sorted(params.items())), size, seed)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    def get(
+        self, distribution: str, params: Dict[str, Any], size: int = 100_000, seed: Hashable = None
+    ) -> npt.NDArray[Any]:
+        """Return the cached population, generating it on a miss."""
+        key = self.make_key(distribution, params, size, seed)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        population = sample_population(distribution, params, size, seed)
+        return self._insert(key, population)
+
+    def _insert(self, key: CacheKey, population: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        if self.spill_dir is not None and population.nbytes >= self.spill_threshold:
+            path = os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".npy")
+            np.save(path, population)
+            population = np.load(path, mmap_mode="r")
+            self._spill_paths[key] = path
+            self.spill_bytes += population.nbytes
+        else:
+            population.flags.writeable = False
+            self.memory_bytes += population.nbytes
+        self._entries[key] = population
+        self._evict()
+        return population
+
+    def _evict(self) -> None:
+        # The newest entry is the population being returned, so it is never evicted, even
+        # if it alone exceeds its budget
+        for key in list(self._entries)[:-1]:
+            over_memory = self.memory_bytes > self.max_bytes
+            over_spill = self.max_spill_bytes is not None and self.spill_bytes > self.max_spill_bytes
+            if not (over_memory or over_spill):
+                return
+            spilled = key in self._spill_paths
+            if (spilled and over_spill) or (not spilled and over_memory):
+                self._remove(key)
+
+    def _remove(self, key: CacheKey) -> None:
+        population = self._entries.pop(key)
+        path = self._spill_paths.pop(key, None)
+        if path is None:
+            self.memory_bytes -= population.nbytes
+            return
+        self.spill_bytes -= population.nbytes
+        del population
+        try:
+            os.remove(path)
+        except OSError:
+            # Still mapped elsewhere (e.g. on Windows); the file is left for the OS to reclaim.
+            pass
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._remove(key)
+
+
+default_cache = PopulationCache()
+
+
+def cached_population(
+    distribution: str, params: Dict[str, Any], size: int = 100_000, seed: Hashable = None
+) -> npt.NDArray[Any]:
+    return default_cache.get(distribution, params, size, seed)
@@ -0,0 +1,74 @@
+from typing import Iterator
+
+import numpy as np
+import numpy.typing as npt
+
+DEFAULT_N_RESAMPLES = 10_000
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes per chunk of drawn samples
+
+RngLike = int | np.random.Generator | np.random.SeedSequence | None
+
+
+def chunk_rows(sample_size: int, itemsize: int, memory_budget: int = DEFAULT_MEMORY_BUDGET) -> int:
+    """Number of resamples that fit in one chunk without exceeding the memory budget.
+
+    Each resample of ``sample_size`` costs one index and one gathered value per draw.
+    At least one row is always returned, so huge sample sizes still make progress.
+    """
+    bytes_per_row = sample_size * (np.dtype(np.int64).itemsize + itemsize)
+    return max(1, memory_budget // bytes_per_row)
+
+
+def iter_resample_means(
+    data: npt.ArrayLike,
+    sample_size: int,
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    rng: RngLike = None,
+    dtype: npt.DTypeLike = np.float64,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+) -> Iterator[npt.NDArray[np.floating]]:
+    """Yield the means of ``n_resamples`` bootstrap samples, one chunk at a time.
+
+    Args:
+        data: Population to resample (with replacement)
+        sample_size: Number of draws per resample
+        n_resamples: Total number of resamples
+        rng: Seed, ``SeedSequence`` or ``Generator`` used for the draws
+        dtype: Floating dtype of the gathered samples and the returned means
+        memory_budget: Upper bound in bytes for the indices and values of one chunk
+
+    Yields:
+        1-D arrays of sample means whose lengths add up to ``n_resamples``
+    """
+    if sample_size < 1:
+        raise ValueError(f"sample_size must be positive, got {sample_size}")
+    population = np.asarray(data, dtype=dtype).ravel()
+    if population.size == 0:
+        raise ValueError("Cannot resample an empty population")
+    generator = np.random.default_rng(rng)
+    index_dtype = np.int32 if population.size <= np.iinfo(np.int32).max else np.int64
+    rows = chunk_rows(sample_size, population.itemsize, memory_budget)
+
+    remaining = n_resamples
+    while remaining > 0:
+        n_rows = min(rows, remaining)
+        indices = generator.integers(0, population.size, size=(n_rows, sample_size), dtype=index_dtype)
+        yield population[indices].mean(axis=1, dtype=dtype)
+        remaining -= n_rows
+
+
+def resample_means(
+    data: npt.ArrayLike,
+    sample_size: int,
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    rng: RngLike = None,
+    dtype: npt.DTypeLike = np.float64,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+) -> npt.NDArray[np.floating]:
+    """Vectorized bootstrap of sample means, see ``iter_resample_means`` for the arguments."""
+    means = np.empty(n_resamples, dtype=dtype)
+    start = 0
+    for chunk in iter_resample_means(data, sample_size, n_resamples, rng, dtype, memory_budget):
+        means[start : start + chunk.size] = chunk
+        start += chunk.size
+    return means
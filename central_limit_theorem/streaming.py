@@ -0,0 +1,159 @@
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ml_boilerplate_module.resampling import (
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_N_RESAMPLES,
+    RngLike,
+    iter_resample_means,
+)
+
+
+class SampleMeanAccumulator:
+    """Constant-memory running statistics over batches of sample means.
+
+    Tracks count, mean, central moments up to the fourth (merged with the pairwise
+    update of Chan et al. / Pébay, which reduces to Welford for single values),
+    min/max and a fixed-bin histogram. Two accumulators with the same bins can be
+    merged, so partial results from parallel workers combine exactly.
+    """
+
+    def __init__(self, bins: int = 50, hist_range: Tuple[float, float] = (0.0, 1.0)):
+        self.bin_edges = np.linspace(hist_range[0], hist_range[1], bins + 1)
+        self.hist_counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._m3 = 0.0
+        self._m4 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, batch: npt.ArrayLike) -> "SampleMeanAccumulator":
+        values = np.asarray(batch, dtype=np.float64).ravel()
+        if values.size == 0:
+            return self
+        batch_mean = float(values.mean())
+        deviations = values - batch_mean
+        squared = deviations * deviations
+        self._combine(
+            values.size,
+            batch_mean,
+            float(squared.sum()),
+            float((squared * deviations).sum()),
+            float((squared * squared).sum()),
+        )
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        counts, _ = np.histogram(values, bins=self.bin_edges)
+        self.hist_counts += counts
+        self.underflow += int(np.count_nonzero(values < self.bin_edges[0]))
+        self.overflow += int(np.count_nonzero(values > self.bin_edges[-1]))
+        return self
+
+    def merge(self, other: "SampleMeanAccumulator") -> "SampleMeanAccumulator":
+        if not np.array_equal(self.bin_edges, other.bin_edges):
+            raise ValueError("Cannot merge accumulators with different histogram bins")
+        if other.count == 0:
+            return self
+        self._combine(other.count, other.mean, other._m2, other._m3, other._m4)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.hist_counts += other.hist_counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def _combine(self, n_b: int, mean_b: float, m2_b: float, m3_b: float, m4_b: float) -> None:
+        n_a, mean_a, m2_a, m3_a = self.count, self.mean, self._m2, self._m3
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        delta_n = delta / n
+        self._m4 += (
+            m4_b
+            + delta * delta_n**3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+            + 6 * delta_n**2 * (n_a * n_a * m2_b + n_b * n_b * m2_a)
+            + 4 * delta_n * (n_a * m3_b - n_b * m3_a)
+        )
+        self._m3 += (
+            m3_b + delta * delta_n**2 * n_a * n_b * (n_a - n_b) + 3 * delta_n * (n_a * m2_b - n_b * m2_a)
+        )
+        self._m2 += m2_b + delta * delta_n * n_a * n_b
+        self.mean = mean_a + delta_n * n_b
+        self.count = n
+
+    @property
+    def variance(self) -> float:
+        """Population variance (``ddof=0``), matching ``np.std`` in the CLT plots."""
+        return self._m2 / self.count if self.count else float("nan")
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    @property
+    def skewness(self) -> float:
+        if not self._m2:
+            return float("nan")
+        return float(np.sqrt(self.count) * self._m3 / self._m2**1.5)
+
+    @property
+    def kurtosis(self) -> float:
+        """Excess kurtosis (0 for a Gaussian)."""
+        if not self._m2:
+            return float("nan")
+        return self.count * self._m4 / self._m2**2 - 3.0
+
+    def histogram_density(self) -> npt.NDArray[np.float64]:
+        """Histogram normalized like ``stat="density"`` over all values seen."""
+        if not self.count:
+            return np.zeros_like(self.hist_counts, dtype=np.float64)
+        return self.hist_counts / (self.count * np.diff(self.bin_edges))
+
+
+def clt_diagnostics(
+    accumulator: SampleMeanAccumulator, clt_std: float, threshold: float = 0.1
+) -> Dict[str, Any]:
+    if np.isfinite(clt_std) and clt_std > 0:
+        std_err = float(abs(clt_std - accumulator.std) / clt_std)
+    else:
+        # Infinite population variance (e.g. Pareto with alpha <= 2): the CLT does not apply.
+        std_err = float("nan")
+    return {
+        "mean_of_means": accumulator.mean,
+        "std_of_means": accumulator.std,
+        "clt_std": float(clt_std),
+        "std_err": std_err,
+        "clt_holds": std_err < threshold,
+        "skewness": accumulator.skewness,
+        "kurtosis": accumulator.kurtosis,
+    }
+
+
+def stream_sample_means(
+    data: npt.ArrayLike,
+    sample_size: int,
+    n_resamples: int = DEFAULT_N_RESAMPLES,
+    rng: RngLike = None,
+    dtype: npt.DTypeLike = np.float64,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    bins: int = 50,
+    hist_range: Tuple[float, float] | None = None,
+) -> SampleMeanAccumulator:
+    """Resample ``data`` chunk by chunk into an accumulator without keeping the means.
+
+    The default histogram range spans five CLT standard errors around the population mean.
+    """
+    population = np.asarray(data)
+    if hist_range is None:
+        center = float(population.mean())
+        half_width = 5 * float(population.std()) / np.sqrt(sample_size) or 1.0
+        hist_range = (center - half_width, center + half_width)
+    accumulator = SampleMeanAccumulator(bins=bins, hist_range=hist_range)
+    for chunk in iter_resample_means(population, sample_size, n_resamples, rng, dtype, memory_budget):
+        accumulator.update(chunk)
+    return accumulator
@@ -5,84 +5,106 @@ from scipy import stats
 from scipy.stats import norm
 import ipywidgets as widgets
 from ipywidgets import interact, interact_manual
+from IPython.display import display
+
+from ml_boilerplate_module.analytic import analytic_sample_means
+from ml_boilerplate_module.distributions import population_mean, population_std
+from ml_boilerplate_module.experiments import condition_value
+from ml_boilerplate_module.fast_plots import (
+    binned_histogram,
+    plot_binned_hist,
+    plot_fast_kde,
+    plot_fast_qq,
+)
+from ml_boilerplate_module.figures import CLTFigure
+from ml_boilerplate_module.parallel import parallel_sample_means
+from ml_boilerplate_module.population_cache import cached_population
+from ml_boilerplate_module.resampling import (
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_N_RESAMPLES,
+    resample_means,
+)
+
+
+def sample_means(
+    data,
+    sample_size,
+    n_resamples=DEFAULT_N_RESAMPLES,
+    rng=None,
+    dtype=np.float64,
+    memory_budget=DEFAULT_MEMORY_BUDGET,
+    n_workers=1,
+):
+    if n_workers != 1:
+        return parallel_sample_means(
+            data,
+            sample_size,
+            n_resamples=n_resamples,
+            seed=rng,
+            n_workers=n_workers,
+            dtype=dtype,
+            memory_budget=memory_budget,
+        )
+    return resample_means(
+        data,
+        sample_size,
+        n_resamples=n_resamples,
+        rng=rng,
+        dtype=dtype,
+        memory_budget=memory_budget,
+    )
 
 
-def sample_means(data, sample_size):
-    means = []
-
-    for _ in range(10_000):
-        sample = np.random.choice(data, size=sample_size)
-        means.append(np.mean(sample))
-
-    return np.array(means)
-
+def _theoretical_population_curve(population_dist, discrete=False):
+    if discrete:
+        support = np.arange(population_dist.ppf(0.0001), population_dist.ppf(0.9999) + 1)
+        return support, population_dist.pmf(support)
+    support = np.linspace(population_dist.ppf(0.0001), population_dist.ppf(0.9999), 200)
+    return support, population_dist.pdf(support)
 
-def gaussian_clt():
-    def _plot(mu, sigma, sample_size):
-        #         mu = 10
-        #         sigma = 5
 
-        gaussian_population = np.random.normal(mu, sigma, 100_000)
-        gaussiam_sample_means = sample_means(gaussian_population, sample_size)
-        x_range = np.linspace(
-            min(gaussiam_sample_means), max(gaussiam_sample_means), 100
-        )
+def _plot_theoretical_population(ax, population_dist, discrete=False):
+    support, density = _theoretical_population_curve(population_dist, discrete)
+    if discrete:
+        ax.bar(support, density, width=0.9)
+    else:
+        ax.plot(support, density)
 
-        sample_means_mean = np.mean(gaussiam_sample_means)
-        sample_means_std = np.std(gaussiam_sample_means)
-        clt_std = sigma / np.sqrt(sample_size)
 
-        estimated_pop_sigma = sample_means_std * np.sqrt(sample_size)
+def _update_clt_figure(clt_figure, population, means, x_range, mu, sigma, population_dist, discrete=False):
+    population_curve = None
+    if population is None and population_dist is not None:
+        population_curve = _theoretical_population_curve(population_dist, discrete)
+    clt_figure.update(
+        means,
+        (x_range, norm.pdf(x_range, loc=mu, scale=sigma)),
+        population=population,
+        population_curve=population_curve,
+    )
+    display(clt_figure.figure)
 
-        std_err = abs(clt_std - sample_means_std) / clt_std
 
-        clt_holds = True if std_err < 0.1 else False
+def _histplot(data, ax, fast=False, **kwargs):
+    if fast:
+        plot_binned_hist(ax, *binned_histogram(data), **kwargs)
+    else:
+        sns.histplot(data, stat="density", ax=ax, **kwargs)
 
-        #         print(f"Mean of sample means: {sample_means_mean:.2f}\n")
-        #         print(f"Std of sample means: {sample_means_std:.2f}\n")
-        #         print(f"Theoretical sigma: {clt_std:.2f}\n")
-        #         print(f"Estimated population sigma: {estimated_pop_sigma:.2f}\n")
 
-        #         print(f"Error: {std_err:.2f}\n")
-        #         print(f"CLT holds?: {clt_holds}\n")
+def _kdeplot(data, ax, fast=False, **kwargs):
+    if fast:
+        plot_fast_kde(ax, data, **kwargs)
+    else:
+        sns.kdeplot(data=data, ax=ax, **kwargs)
 
-        mu2 = mu
-        sigma2 = sigma / np.sqrt(sample_size)
-        #         fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(10, 6))
-        fig, axes = plt.subplot_mosaic(
-            [["top row", "top row"], ["bottom left", "bottom right"]], figsize=(10, 5)
-        )
 
-        ax1 = axes["top row"]
-        ax2 = axes["bottom left"]
-        ax3 = axes["bottom right"]
-        sns.histplot(gaussian_population, stat="density", ax=ax1)
-        ax1.set_title("Population Distribution")
-        ax2.set_title("Sample Means Distribution")
-        ax3.set_title("QQ Plot of Sample Means")
+def _probplot(data, ax, fast=False):
+    if fast:
+        return plot_fast_qq(ax, data)
+    return stats.probplot(data, plot=ax, fit=True)
 
-        sns.histplot(gaussiam_sample_means, stat="density", ax=ax2, label="hist")
-        sns.kdeplot(
-            data=gaussiam_sample_means,
-            color="crimson",
-            ax=ax2,
-            label="kde",
-            linestyle="dashed",
-            fill=True,
-        )
-        ax2.plot(
-            x_range,
-            norm.pdf(x_range, loc=mu2, scale=sigma2),
-            color="black",
-            label="gaussian",
-            linestyle="solid",
-        )
-        ax2.legend()
-
-        stats.probplot(gaussiam_sample_means, plot=ax3, fit=True)
-        plt.tight_layout()
-        plt.show()
 
+def gaussian_clt(n_workers=1, analytic=False, seed=None, fast=False, persistent=False):
     mu_selection = widgets.FloatSlider(
         value=10.0,
         min=0.01,
@@ -109,110 +131,24 @@ def gaussian_clt():
         readout_format=".1f",
     )
 
-    sample_size_selection = widgets.IntSlider(
-        value=2,
-        min=2,
-        max=100,
-        step=1,
-        description="sample_size",
-        disabled=False,
-        continuous_update=False,
-        orientation="horizontal",
-        readout=True,
-        readout_format="d",
-    )
-
-    interact_manual(
-        _plot, sample_size=sample_size_selection, mu=mu_selection, sigma=sigma_selection
+    distribution_clt(
+        "gaussian",
+        n_workers=n_workers,
+        analytic=analytic,
+        seed=seed,
+        fast=fast,
+        persistent=persistent,
+        max_sample_size=100,
+        param_widgets={"mu": mu_selection, "sigma": sigma_selection},
+        population_dist=lambda mu, sigma: stats.norm(mu, sigma),
     )
 
 
-def binomial_clt():
-    def _plot(n, p, sample_size):
-        mu = n * p
-        sigma = np.sqrt(n * p * (1 - p)) / np.sqrt(sample_size)
-        N = n * sample_size
-#         sigma = np.sqrt(n * p * (1 - p)) / np.sqrt(N)
-
-        binomial_population = np.random.binomial(n, p, 100_000)
-
-        binomial_sample_means = sample_means(binomial_population, sample_size)
-
-        x_range = np.linspace(
-            min(binomial_sample_means), max(binomial_sample_means), 100
-        )
+def _print_binomial_condition(params, sample_size):
+    print(f"Condition value: {condition_value('binomial', params, sample_size):.1f}")
 
-        condition_val = np.min([N * p, N * (1 - p)])
-
-        condition = True if condition_val >= 5 else False
-
-        sample_means_mean = np.mean(binomial_sample_means)
-        sample_means_std = np.std(binomial_sample_means)
-        clt_std = np.std(binomial_population) / np.sqrt(sample_size)
-
-        estimated_pop_sigma = sample_means_std * np.sqrt(sample_size)
-
-        std_err = abs(clt_std - sample_means_std) / clt_std
-
-        clt_holds = True if std_err < 0.1 else False
-
-        #         print(f"Value of N: {N}\n")
-        print(f"Condition value: {condition_val:.1f}")
-
-        #         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-        fig, axes = plt.subplot_mosaic(
-            [["top row", "top row"], ["bottom left", "bottom right"]], figsize=(10, 5)
-        )
-
-        ax1 = axes["top row"]
-        ax2 = axes["bottom left"]
-        ax3 = axes["bottom right"]
-        ax1.set_title("Population Distribution")
-        ax2.set_title("Sample Means Distribution")
-        ax3.set_title("QQ Plot of Sample Means")
-        sns.histplot(binomial_population, stat="density", ax=ax1)
-
-        sns.histplot(binomial_sample_means, stat="density", ax=ax2, label="hist")
-        sns.kdeplot(
-            data=binomial_sample_means,
-            color="crimson",
-            ax=ax2,
-            label="kde",
-            linestyle="dashed",
-            fill=True,
-        )
-        ax2.plot(
-            x_range,
-            norm.pdf(x_range, loc=mu, scale=sigma),
-            color="black",
-            label="gaussian",
-            linestyle="solid",
-        )
-        ax2.legend()
-        stats.probplot(binomial_sample_means, plot=ax3, fit=True)
-        plt.tight_layout()
-        plt.show()
-
-    #         print(f"Condition holds?: {condition} with value of {condition_val:.2f}\n")
-
-    #         print(f"Mean of sample means: {sample_means_mean:.2f}\n")
-    #         print(f"Std of sample means: {sample_means_std:.2f}\n")
-    #         print(f"Theoretical sigma: {clt_std:.2f}\n")
-    #         print(f"Estimated population sigma: {estimated_pop_sigma:.2f}\n")
-
-    sample_size_selection = widgets.IntSlider(
-        value=2,
-        min=2,
-        max=50,
-        step=1,
-        description="sample_size",
-        disabled=False,
-        continuous_update=False,
-        orientation="horizontal",
-        readout=True,
-        readout_format="d",
-    )
 
+def binomial_clt(n_workers=1, analytic=False, seed=None, fast=False, persistent=False):
     n_selection = widgets.IntSlider(
         value=2,
         min=2,
@@ -239,23 +175,97 @@ def binomial_clt():
         readout_format=".1f",
     )
 
-    interact_manual(
-        _plot,
-        sample_size=sample_size_selection,
-        p=prob_success_selection,
-        n=n_selection,
+    distribution_clt(
+        "binomial",
+        n_workers=n_workers,
+        analytic=analytic,
+        seed=seed,
+        fast=fast,
+        persistent=persistent,
+        max_sample_size=50,
+        param_widgets={"n": n_selection, "p": prob_success_selection},
+        population_dist=stats.binom,
+        discrete=True,
+        report=_print_binomial_condition,
     )
 
 
-def poisson_clt():
-    def _plot(mu, sample_size):
-        sigma = np.sqrt(mu) / np.sqrt(sample_size)
+def poisson_clt(n_workers=1, analytic=False, seed=None, fast=False, persistent=False):
+    mu_selection = widgets.FloatSlider(
+        value=1.5,
+        min=0.01,
+        max=5.0,
+        #         step=1.0,
+        description="mu",
+        disabled=False,
+        continuous_update=False,
+        orientation="horizontal",
+        readout=True,
+        readout_format=".1f",
+    )
 
-        poisson_population = np.random.poisson(mu, 100_000)
+    distribution_clt(
+        "poisson",
+        n_workers=n_workers,
+        analytic=analytic,
+        seed=seed,
+        fast=fast,
+        persistent=persistent,
+        max_sample_size=50,
+        param_widgets={"mu": mu_selection},
+        population_dist=stats.poisson,
+        discrete=True,
+    )
 
-        poisson_sample_means = sample_means(poisson_population, sample_size)
 
-        x_range = np.linspace(min(poisson_sample_means), max(poisson_sample_means), 100)
+def distribution_clt(
+    distribution,
+    params=None,
+    n_workers=1,
+    analytic=False,
+    seed=None,
+    fast=False,
+    persistent=False,
+    max_sample_size=100,
+    param_widgets=None,
+    population_dist=None,
+    discrete=False,
+    report=None,
+):
+    """Interactive CLT widget for any registered distribution.
+
+    ``params`` are fixed distribution parameters; ``param_widgets`` maps the remaining ones
+    to sliders. ``population_dist(**params)`` is the scipy distribution drawn instead of the
+    population histogram in analytic mode, and ``report(params, sample_size)`` prints
+    distribution-specific diagnostics.
+    """
+    fixed_params = params or {}
+    clt_figure = CLTFigure() if persistent else None
+
+    def _plot(sample_size, **widget_params):
+        params = {**fixed_params, **widget_params}
+        mu = population_mean(distribution, params)
+        sigma = population_std(distribution, params) / np.sqrt(sample_size)
+        if analytic:
+            population = None
+            means = analytic_sample_means(distribution, params, sample_size)
+        else:
+            population = cached_population(distribution, params, seed=seed)
+            means = sample_means(population, sample_size, n_workers=n_workers)
+
+        x_range = np.linspace(np.min(means), np.max(means), 100)
+        if report is not None:
+            report(params, sample_size)
+        if np.isfinite(sigma):
+            std_err = abs(sigma - np.std(means)) / sigma
+            print(f"Std error: {std_err:.3f}, CLT holds?: {std_err < 0.1}")
+        else:
+            print("Population variance is infinite, the CLT does not apply")
+
+        theoretical_dist = population_dist(**params) if population_dist is not None else None
+        if clt_figure is not None:
+            _update_clt_figure(clt_figure, population, means, x_range, mu, sigma, theoretical_dist, discrete)
+            return
 
         fig, axes = plt.subplot_mosaic(
             [["top row", "top row"], ["bottom left", "bottom right"]], figsize=(10, 5)
@@ -267,13 +277,17 @@ def poisson_clt():
         ax1.set_title("Population Distribution")
         ax2.set_title("Sample Means Distribution")
         ax3.set_title("QQ Plot of Sample Means")
-        sns.histplot(poisson_population, stat="density", ax=ax1)
-
-        sns.histplot(poisson_sample_means, stat="density", ax=ax2, label="hist")
-        sns.kdeplot(
-            data=poisson_sample_means,
+        if population is not None:
+            _histplot(population, ax1, fast=fast)
+        elif theoretical_dist is not None:
+            _plot_theoretical_population(ax1, theoretical_dist, discrete=discrete)
+
+        _histplot(means, ax2, fast=fast, label="hist")
+        _kdeplot(
+            means,
+            ax2,
+            fast=fast,
             color="crimson",
-            ax=ax2,
             label="kde",
             linestyle="dashed",
             fill=True,
@@ -286,14 +300,14 @@ def poisson_clt():
             linestyle="solid",
         )
         ax2.legend()
-        stats.probplot(poisson_sample_means, plot=ax3, fit=True)
+        _probplot(means, ax3, fast=fast)
         plt.tight_layout()
         plt.show()
 
     sample_size_selection = widgets.IntSlider(
         value=2,
         min=2,
-        max=50,
+        max=max_sample_size,
         step=1,
         description="sample_size",
         disabled=False,
@@ -303,39 +317,27 @@ def poisson_clt():
         readout_format="d",
     )
 
-    mu_selection = widgets.FloatSlider(
-        value=1.5,
-        min=0.01,
-        max=5.0,
-        #         step=1.0,
-        description="mu",
-        disabled=False,
-        continuous_update=False,
-        orientation="horizontal",
-        readout=True,
-        readout_format=".1f",
-    )
-
-    interact_manual(_plot, sample_size=sample_size_selection, mu=mu_selection)
+    interact_manual(_plot, sample_size=sample_size_selection, **(param_widgets or {}))
 
 
-def plot_kde_and_qq(sample_means_data, mu_sample_means, sigma_sample_means):
+def plot_kde_and_qq(sample_means_data, mu_sample_means, sigma_sample_means, fast=False):
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
 
     # Define the x-range for the Gaussian curve (this is just for plotting purposes)
-    x_range = np.linspace(min(sample_means_data), max(sample_means_data), 100)
+    x_range = np.linspace(np.min(sample_means_data), np.max(sample_means_data), 100)
 
     # Histogram of sample means (blue)
-    sns.histplot(sample_means_data, stat="density", label="hist", ax=ax1)
+    _histplot(sample_means_data, ax1, fast=fast, label="hist")
 
     # Estimated PDF of sample means (red)
-    sns.kdeplot(
-        data=sample_means_data,
+    _kdeplot(
+        sample_means_data,
+        ax1,
+        fast=fast,
         color="crimson",
         label="kde",
         linestyle="dashed",
         fill=True,
-        ax=ax1,
     )
 
     # Gaussian curve with estimated mu and sigma (black)
@@ -346,7 +348,7 @@ def plot_kde_and_qq(sample_means_data, mu_sample_means, sigma_sample_means):
         label="gaussian",
     )
 
-    res = stats.probplot(sample_means_data, plot=ax2, fit=True)
+    res = _probplot(sample_means_data, ax2, fast=fast)
 
     ax1.legend()
     plt.show()